@@ -0,0 +1,161 @@
+"""Measure storage savings and throughput of compressing attachments at rest.
+
+Run from tasks-service so its settings (.env) are picked up:
+
+    cd tasks-service && python ../benchmarks/bench_attachment_compression.py
+
+Each file of a synthetic corpus (logs, a CSV and a JSON export next to
+already-compressed media) is written through the tasks-service blob store
+with blob_compression off and on. For both settings the script reports stored
+bytes, upload throughput and download throughput. With compression on it
+also reports the throughput of passing the stored bytes through as
+Content-Encoding. Throughput is computed on logical (uncompressed) bytes.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "tasks-service"))
+scratch = None
+if "BLOB_STORE_PATH" not in os.environ:
+    scratch = os.environ["BLOB_STORE_PATH"] = tempfile.mkdtemp(prefix="blobs-")
+
+from src.config import settings  # noqa: E402
+from src.storage import blob_store, iterate_bytes  # noqa: E402
+
+LEVELS = ("DEBUG", "INFO", "INFO", "INFO", "WARNING", "ERROR")
+PATHS = ("/tasks", "/tasks/42", "/tasks/bulk", "/reports/day", "/login")
+
+
+def make_log(rng, size):
+    lines = []
+    total = 0
+    while total < size:
+        line = (
+            f"2026-10-18T12:{rng.randrange(60):02d}:{rng.randrange(60):02d}."
+            f"{rng.randrange(1000):03d}Z {rng.choice(LEVELS)} "
+            f"request_id={rng.getrandbits(64):016x} "
+            f"path={rng.choice(PATHS)} status={rng.choice((200, 201, 204, 404))} "
+            f"duration_ms={rng.uniform(0.5, 250):.2f}\n"
+        )
+        lines.append(line)
+        total += len(line)
+    return "".join(lines).encode()
+
+
+def make_csv(rng, size):
+    rows = ["id,user_id,title,is_completed,due_date,score\n"]
+    total = len(rows[0])
+    while total < size:
+        row = (
+            f"{len(rows)},{rng.randrange(1, 5000)},task {rng.randrange(10**6)},"
+            f"{rng.choice(('true', 'false'))},2026-{rng.randrange(1, 13):02d}-"
+            f"{rng.randrange(1, 29):02d},{rng.random():.6f}\n"
+        )
+        rows.append(row)
+        total += len(row)
+    return "".join(rows).encode()
+
+
+def make_json(rng, size):
+    tasks = []
+    total = 0
+    while total < size:
+        task = {
+            "id": len(tasks) + 1,
+            "user_id": rng.randrange(1, 5000),
+            "title": f"task {rng.randrange(10**6)}",
+            "description": " ".join(rng.choice(PATHS) for _ in range(6)),
+            "is_completed": rng.random() < 0.5,
+            "due_date": f"2026-{rng.randrange(1, 13):02d}-01T00:00:00+00:00",
+        }
+        tasks.append(task)
+        total += len(json.dumps(task)) + 2
+    return json.dumps({"tasks": tasks}).encode()
+
+
+def make_corpus(size, seed):
+    rng = random.Random(seed)
+    return [
+        ("app.log", "text/plain", make_log(rng, size)),
+        ("export.csv", "text/csv", make_csv(rng, size)),
+        ("tasks.json", "application/json", make_json(rng, size)),
+        ("photo.jpg", "image/jpeg", rng.randbytes(size // 2)),
+        ("archive.bin", "application/octet-stream", rng.randbytes(size // 2)),
+    ]
+
+
+async def drain(chunks):
+    total = 0
+    async for chunk in chunks:
+        total += len(chunk)
+    return total
+
+
+async def measure(content_type, data, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        staged = await blob_store.stage(iterate_bytes(data), content_type)
+        await blob_store.commit(staged)
+    upload = (time.perf_counter() - started) / rounds
+    started = time.perf_counter()
+    for _ in range(rounds):
+        await drain(blob_store.iterate(staged.digest, encoding=staged.encoding))
+    download = (time.perf_counter() - started) / rounds
+    started = time.perf_counter()
+    for _ in range(rounds):
+        await drain(
+            blob_store.iterate(staged.digest, encoding=staged.encoding, decode=False)
+        )
+    passthrough = (time.perf_counter() - started) / rounds
+    await blob_store.delete(staged.digest)
+    return staged, upload, download, passthrough
+
+
+def rate(size, seconds):
+    return f"{size / seconds / 2**20:8.1f} MB/s"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=8 * 2**20)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    try:
+        corpus = make_corpus(args.size, args.seed)
+        for enabled in (False, True):
+            settings.blob_compression = enabled
+            print(f"blob_compression={enabled} level={settings.blob_compression_level}")
+            logical = stored = 0
+            for name, content_type, data in corpus:
+                staged, upload, download, passthrough = asyncio.run(
+                    measure(content_type, data, args.rounds)
+                )
+                logical += staged.size
+                stored += staged.stored_size
+                print(
+                    f"  {name:<12} {staged.encoding or 'raw':<5} "
+                    f"{staged.size:>10} -> {staged.stored_size:>10} bytes "
+                    f"{staged.stored_size / staged.size:6.1%}  "
+                    f"upload {rate(staged.size, upload)}  "
+                    f"download {rate(staged.size, download)}  "
+                    f"passthrough {rate(staged.size, passthrough)}"
+                )
+            print(
+                f"  total        {logical:>16} -> {stored:>10} bytes {stored / logical:6.1%}"
+            )
+    finally:
+        if scratch is not None:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
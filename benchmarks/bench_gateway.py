@@ -0,0 +1,183 @@
+"""Measure gateway overhead against a local stand-in upstream.
+
+Run with the gateway's requirements installed:
+
+    python benchmarks/bench_gateway.py --requests 2000
+
+The stand-in upstream listens on a real TCP port, so connection setup and
+pooling costs are part of the numbers. Overhead is the latency of a call
+through the gateway minus the latency of the same call made directly.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "gateway"))
+
+UPSTREAM_HOST = "127.0.0.1"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((UPSTREAM_HOST, 0))
+        return sock.getsockname()[1]
+
+
+PORT = free_port()
+UPSTREAM_URL = f"http://{UPSTREAM_HOST}:{PORT}"
+
+for key, value in {
+    "url": "http://localhost:8000",
+    "users_service_url": UPSTREAM_URL,
+    "tasks_service_url": UPSTREAM_URL,
+    "secret_key": "bench-secret-key",
+    "algorithm": "HS256",
+    "access_token_expire_time": "30",
+    "mail_username": "bench",
+    "mail_password": "bench",
+    "mail_from": "bench@example.com",
+    "mail_port": "587",
+    "mail_server": "localhost",
+    "mail_tls": "False",
+    "mail_ssl": "False",
+    "use_credentials": "False",
+    "google_client_id": "bench",
+    "google_client_secret": "bench",
+    "redirect_url": "http://localhost:8000/login/google/callback",
+    "cache_expiry_time": "60",
+    "rate_limit_enabled": "False",
+}.items():
+    os.environ[key] = value
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from fastapi import FastAPI, Header  # noqa: E402
+from main import app  # noqa: E402
+from utils import create_access_token  # noqa: E402
+
+header = Header(...)
+
+
+def make_tasks(count, uid):
+    return [
+        {
+            "id": i,
+            "user_id": uid,
+            "title": f"task {i}",
+            "description": f"description for task {i}",
+            "is_completed": i % 2 == 0,
+            "created_at": "2023-06-01T00:00:00+00:00",
+            "updated_at": "2023-06-01T00:00:00+00:00",
+            "due_date": "2023-06-10T00:00:00+00:00",
+            "completed_at": None,
+        }
+        for i in range(count)
+    ]
+
+
+def start_upstream(task_count):
+    stand_in = FastAPI()
+    payload = {"status": "success", "data": {"tasks": make_tasks(task_count, 1)}}
+
+    @stand_in.get("/tasks")
+    async def get_tasks(email: str = header, uid: str = header):
+        return payload
+
+    config = uvicorn.Config(
+        stand_in, host=UPSTREAM_HOST, port=PORT, log_level="warning"
+    )
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def time_calls(client, url, headers, count, concurrency):
+    samples = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call():
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(url, headers=headers)
+            samples.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.text
+
+    await asyncio.gather(*(call() for _ in range(count)))
+    return samples
+
+
+async def run(args):
+    token = create_access_token({"user_email": "bench@example.com", "user_id": 1})
+    async with httpx.AsyncClient() as direct:
+        direct_samples = await time_calls(
+            direct,
+            f"{UPSTREAM_URL}/tasks",
+            {"email": "bench@example.com", "uid": "1"},
+            args.requests,
+            args.concurrency,
+        )
+    for handler in app.router.on_startup:
+        await handler()
+    try:
+        async with httpx.AsyncClient(app=app, base_url="http://gateway") as gateway:
+            gateway_samples = await time_calls(
+                gateway,
+                "/tasks",
+                {"Authorization": f"Bearer {token}"},
+                args.requests,
+                args.concurrency,
+            )
+    finally:
+        for handler in app.router.on_shutdown:
+            await handler()
+    return direct_samples, gateway_samples
+
+
+def report(name, samples):
+    print(
+        f"{name:<10} p50={percentile(samples, 50) * 1000:8.3f}ms "
+        f"p99={percentile(samples, 99) * 1000:8.3f}ms "
+        f"mean={statistics.mean(samples) * 1000:8.3f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--tasks", type=int, default=20)
+    args = parser.parse_args()
+
+    server = start_upstream(args.tasks)
+    try:
+        direct_samples, gateway_samples = asyncio.run(run(args))
+    finally:
+        server.should_exit = True
+    report("direct", direct_samples)
+    report("gateway", gateway_samples)
+    overhead = [
+        percentile(gateway_samples, pct) - percentile(direct_samples, pct)
+        for pct in (50, 99)
+    ]
+    print(
+        f"{'overhead':<10} p50={overhead[0] * 1000:8.3f}ms "
+        f"p99={overhead[1] * 1000:8.3f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Load test a running tasks-service with many concurrent clients.
+
+Start tasks-service against a seeded database, then:
+
+    python benchmarks/load_tasks_service.py --url http://localhost:8002 \
+        --clients 200 --duration 30
+
+Every client is a separate user (uid header) that loops over GET /tasks,
+GET /tasks/{id} and GET /reports/count until the duration runs out. Run it
+once against a build on synchronous sessions and once against the async
+stack to compare throughput and tail latency; --seed creates --tasks tasks
+per user first so both runs see the same data.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+PATHS = ("/tasks/", "/tasks/{task_id}", "/reports/count")
+
+
+def user_headers(uid):
+    return {"uid": str(uid), "email": f"load{uid}@example.com"}
+
+
+async def seed(client, uid, tasks):
+    task_ids = []
+    for i in range(tasks):
+        response = await client.post(
+            "/tasks/",
+            json={"title": f"load task {i}", "description": "load test"},
+            headers=user_headers(uid),
+        )
+        response.raise_for_status()
+        task_ids.append(response.json()["data"]["task"]["id"])
+    return task_ids
+
+
+async def find_task(client, uid):
+    response = await client.get("/tasks/", headers=user_headers(uid))
+    if response.status_code != 200:
+        return None
+    return response.json()["data"]["tasks"][0]["id"]
+
+
+async def run_client(client, uid, task_id, deadline, latencies, errors):
+    step = 0
+    while time.monotonic() < deadline:
+        path = PATHS[step % len(PATHS)].format(task_id=task_id)
+        step += 1
+        started = time.monotonic()
+        try:
+            response = await client.get(path, headers=user_headers(uid))
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+                continue
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+            continue
+        latencies.append(time.monotonic() - started)
+
+
+async def main(args):
+    limits = httpx.Limits(max_connections=args.clients)
+    async with httpx.AsyncClient(
+        base_url=args.url, limits=limits, timeout=60, follow_redirects=True
+    ) as client:
+        uids = range(args.first_uid, args.first_uid + args.clients)
+        if args.seed:
+            await asyncio.gather(*(seed(client, uid, args.tasks) for uid in uids))
+        task_ids = await asyncio.gather(*(find_task(client, uid) for uid in uids))
+        latencies = []
+        errors = []
+        started = time.monotonic()
+        deadline = started + args.duration
+        await asyncio.gather(
+            *(
+                run_client(client, uid, task_id or 1, deadline, latencies, errors)
+                for uid, task_id in zip(uids, task_ids)
+            )
+        )
+        elapsed = time.monotonic() - started
+    if not latencies:
+        print(f"no successful requests, {len(errors)} errors")
+        return
+    cuts = statistics.quantiles(latencies, n=100)
+    print(f"clients     {args.clients}")
+    print(f"requests    {len(latencies)} ok, {len(errors)} errors")
+    print(f"throughput  {len(latencies) / elapsed:8.1f} req/s")
+    print(f"p50         {cuts[49] * 1000:8.1f}ms")
+    print(f"p99         {cuts[98] * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8002")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--tasks", type=int, default=20)
+    parser.add_argument("--first-uid", type=int, default=100000)
+    parser.add_argument("--seed", action="store_true")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,112 @@
+import asyncio
+import heapq
+import itertools
+from contextvars import ContextVar
+
+from fastapi import HTTPException, status
+
+PRIORITIES = {"crud": 0, "reports": 1, "batch": 2}
+
+request_priority = ContextVar("request_priority", default=None)
+
+
+def priority_for(path: str):
+    priority = request_priority.get()
+    if priority is not None:
+        return priority
+    if path.startswith("/reports"):
+        return "reports"
+    return "crud"
+
+
+def shed_error(reason: str):
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=f"request shed: {reason}",
+        headers={"Retry-After": "1"},
+    )
+
+
+class AdaptiveLimiter:
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        queue_size: int,
+        queue_timeout: float,
+        latency_target: float,
+        backoff: float,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.in_flight = 0
+        self.queue = []
+        self.sequence = itertools.count()
+        self.shed = dict.fromkeys(PRIORITIES, 0)
+
+    async def acquire(self, priority: str):
+        if self.in_flight < int(self.limit) and not self.queue:
+            self.in_flight += 1
+            return
+        rank = PRIORITIES[priority]
+        if len(self.queue) >= self.queue_size:
+            lowest = max(self.queue)
+            if lowest[0] <= rank:
+                self.shed[priority] += 1
+                raise shed_error("upstream queue is full")
+            self.queue.remove(lowest)
+            heapq.heapify(self.queue)
+            self.shed[lowest[3]] += 1
+            lowest[2].set_exception(shed_error("displaced by higher priority work"))
+        future = asyncio.get_running_loop().create_future()
+        entry = (rank, next(self.sequence), future, priority)
+        heapq.heappush(self.queue, entry)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.discard(entry)
+            self.shed[priority] += 1
+            raise shed_error("timed out waiting for upstream capacity") from None
+        except asyncio.CancelledError:
+            self.discard(entry)
+            raise
+
+    def discard(self, entry):
+        future = entry[2]
+        if entry in self.queue:
+            self.queue.remove(entry)
+            heapq.heapify(self.queue)
+            future.cancel()
+        elif future.done() and not future.cancelled() and not future.exception():
+            self.in_flight -= 1
+            self.grant()
+
+    def release(self, latency: float, failed: bool):
+        self.in_flight -= 1
+        if failed or latency > self.latency_target:
+            self.limit = max(self.min_limit, self.limit * self.backoff)
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self.grant()
+
+    def grant(self):
+        while self.queue and self.in_flight < int(self.limit):
+            _, _, future, _ = heapq.heappop(self.queue)
+            if future.done():
+                continue
+            self.in_flight += 1
+            future.set_result(None)
+
+    def stats(self):
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": len(self.queue),
+            "shed": dict(self.shed),
+        }
@@ -0,0 +1,140 @@
+import gzip
+import zlib
+from contextvars import ContextVar
+
+import zstandard
+from starlette.datastructures import Headers, MutableHeaders
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+accepted_encoding = ContextVar("accepted_encoding", default="identity")
+
+
+def parse_accept_encoding(value: str):
+    accepted = {}
+    for item in value.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.lower()] = quality
+    return accepted
+
+
+def choose_encoding(value: str, supported=("zstd", "gzip")):
+    accepted = parse_accept_encoding(value)
+    for encoding in supported:
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+def compress(encoding: str, level: int, body: bytes):
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(body)
+    return gzip.compress(body, compresslevel=level)
+
+
+class Compressor:
+    def __init__(self, encoding: str, level: int):
+        if encoding == "zstd":
+            self.stream = zstandard.ZstdCompressor(level=level).compressobj()
+        else:
+            self.stream = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes):
+        return self.stream.compress(data)
+
+    def flush(self):
+        return self.stream.flush()
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        gzip_level: int = 5,
+        zstd_level: int = 3,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {"gzip": gzip_level, "zstd": zstd_level}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        header = Headers(scope=scope).get("accept-encoding", "")
+        token = accepted_encoding.set(header or "identity")
+        try:
+            encoding = choose_encoding(header)
+            if encoding is None:
+                await self.app(scope, receive, send)
+            else:
+                await self.app(scope, receive, self.responder(send, encoding))
+        finally:
+            accepted_encoding.reset(token)
+
+    def responder(self, send, encoding: str):
+        state = {"start": None, "compressor": None, "passthrough": False}
+
+        async def send_compressed(message):
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                # Attachment downloads advertise Accept-Ranges and are sent
+                # as they come from upstream.
+                state["passthrough"] = (
+                    "content-encoding" in headers
+                    or "accept-ranges" in headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                )
+                state["start"] = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            start = state["start"]
+            if state["passthrough"]:
+                if start is not None:
+                    state["start"] = None
+                    await send(start)
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                state["start"] = None
+                if len(body) < self.minimum_size and not more_body:
+                    state["passthrough"] = True
+                    await send(start)
+                    await send(message)
+                    return
+                level = self.levels[encoding]
+                headers = MutableHeaders(raw=start["headers"])
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "content-length" in headers:
+                    del headers["Content-Length"]
+                if not more_body:
+                    body = compress(encoding, level, body)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                state["compressor"] = Compressor(encoding, level)
+                await send(start)
+            compressor = state["compressor"]
+            body = compressor.compress(body)
+            if not more_body:
+                body += compressor.flush()
+            await send(
+                {"type": "http.response.body", "body": body, "more_body": more_body}
+            )
+
+        return send_compressed
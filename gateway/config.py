@@ -1,3 +1,5 @@
+from typing import Dict, List, Tuple
+
 from pydantic import BaseSettings
 
 
@@ -20,6 +22,54 @@ class Settings(BaseSettings):
     google_client_secret: str
     redirect_url: str
     cache_expiry_time: int
+    upstream_max_connections: int = 100
+    upstream_max_keepalive_connections: int = 20
+    upstream_keepalive_expiry: float = 30.0
+    upstream_http2: bool = False
+    proxy_passthrough: bool = False
+    max_upload_size: int = 100 * 1024 * 1024
+    token_cache_size: int = 10000
+    coalesce_requests: bool = True
+    batch_max_requests: int = 20
+    batch_concurrency: int = 5
+    users_service_connect_timeout: float = 3.0
+    users_service_read_timeout: float = 10.0
+    tasks_service_connect_timeout: float = 3.0
+    tasks_service_read_timeout: float = 10.0
+    max_retries: int = 2
+    retry_backoff: float = 0.05
+    retry_budget_ratio: float = 0.2
+    retry_budget_max_tokens: float = 10.0
+    breaker_failure_threshold: int = 5
+    breaker_reset_timeout: float = 30.0
+    users_service_replicas: List[str] = []
+    tasks_service_replicas: List[str] = []
+    upstream_strategy: str = "least_outstanding"
+    health_check_path: str = "/"
+    health_check_interval: float = 5.0
+    health_check_timeout: float = 1.0
+    admission_control_enabled: bool = True
+    admission_initial_limit: int = 20
+    admission_min_limit: int = 2
+    admission_max_limit: int = 200
+    admission_queue_size: int = 100
+    admission_queue_timeout: float = 5.0
+    admission_latency_target: float = 1.0
+    admission_backoff: float = 0.9
+    compression_minimum_size: int = 1024
+    compression_gzip_level: int = 5
+    compression_zstd_level: int = 3
+    redis_url: str = "redis://redis:6379/0"
+    rate_limit_enabled: bool = True
+    rate_limits: Dict[str, Tuple[int, float]] = {
+        "read": (120, 60),
+        "write": (60, 60),
+        "anonymous": (30, 60),
+        "login": (5, 60),
+    }
+    rate_limit_redis_timeout: float = 0.1
+    rate_limit_redis_backoff: float = 5.0
+    rate_limit_local_max_keys: int = 10000
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,43 @@
+import posixpath
+from typing import Any, Dict, List, Optional
+from urllib.parse import unquote, urlsplit
+
+from pydantic import BaseModel, validator
+
+BATCH_METHODS = {"GET", "POST", "PUT", "DELETE"}
+
+
+class BatchItemRequest(BaseModel):
+    method: str = "GET"
+    path: str
+    params: Optional[Dict[str, Any]]
+    body: Optional[Any]
+
+    @validator("method")
+    def check_method(cls, value):
+        value = value.upper()
+        if value not in BATCH_METHODS:
+            raise ValueError(f"method must be one of {sorted(BATCH_METHODS)}")
+        return value
+
+    @validator("path")
+    def check_path(cls, value):
+        if not value.startswith("/") or value.startswith("//"):
+            raise ValueError("path must be a gateway route starting with '/'")
+        path = unquote(urlsplit(value).path)
+        if posixpath.normpath("/" + path.lstrip("/")) == "/batch":
+            raise ValueError("batch requests cannot be nested")
+        return value
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItemRequest]
+
+
+class BatchItemResponse(BaseModel):
+    status: int
+    body: Optional[Any]
+
+
+class BatchResponse(BaseModel):
+    responses: List[BatchItemResponse]
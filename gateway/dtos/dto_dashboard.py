@@ -0,0 +1,22 @@
+from typing import List, Optional
+
+from dtos import dto_reports, dto_tasks
+from pydantic import BaseModel
+
+
+class DashboardReports(BaseModel):
+    count: Optional[dto_reports.CountReportResponse]
+    average: Optional[dto_reports.AverageReportResponse]
+    overdue: Optional[dto_reports.OverdueReportResponse]
+    max: Optional[dto_reports.DateMaxReportResponse]
+    day: Optional[List[dto_reports.DayTasksReportResponse]]
+
+
+class DashboardObject(BaseModel):
+    tasks: Optional[List[dto_tasks.TaskResponse]]
+    reports: DashboardReports
+
+
+class DashboardResponse(BaseModel):
+    status: str
+    data: DashboardObject
@@ -40,3 +40,11 @@ class DayTasksReportResponse(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class StorageReportResponse(BaseModel):
+    logical_bytes: int
+    stored_bytes: int
+
+    class Config:
+        orm_mode = True
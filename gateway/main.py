@@ -1,14 +1,31 @@
-import json
-from datetime import datetime
+import asyncio
+from typing import Optional
 
+import admission
+import compression
 import httpx
+import orjson
+import ratelimit
+import upstream
 from config import settings
-from dtos import dto_misc, dto_reports, dto_tasks, dto_users
-from fastapi import Depends, FastAPI, HTTPException
+from dtos import dto_batch, dto_dashboard, dto_misc, dto_reports, dto_tasks, dto_users
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from utils import validate_user
-
-app = FastAPI()
+from singleflight import coalesce
+from singleflight import stats as coalesce_stats
+from starlette.background import BackgroundTask
+from utils import token_cache, validate_user
+
+app = FastAPI(default_response_class=ORJSONResponse)
+app.add_middleware(
+    compression.CompressionMiddleware,
+    minimum_size=settings.compression_minimum_size,
+    gzip_level=settings.compression_gzip_level,
+    zstd_level=settings.compression_zstd_level,
+)
+app.add_event_handler("startup", upstream.open_clients)
+app.add_event_handler("shutdown", upstream.close_clients)
 
 
 users_url = settings.users_service_url
@@ -16,7 +33,22 @@ tasks_url = settings.tasks_service_url
 
 
 depends = Depends()
-validated_user = Depends(validate_user)
+authenticated_user = Depends(validate_user)
+optional_header = Header(None)
+
+
+async def limit_user(request: Request, current_user: int = authenticated_user):
+    route_class = "read" if request.method == "GET" else "write"
+    await ratelimit.check(route_class, f"user:{current_user.id}")
+    return current_user
+
+
+async def limit_ip(request: Request):
+    await ratelimit.check("anonymous", f"ip:{request.client.host}")
+
+
+validated_user = Depends(limit_user)
+limited_ip = Depends(limit_ip)
 
 
 @app.get("/")
@@ -24,6 +56,44 @@ def root():
     return {"Hello World!"}
 
 
+@app.get("/metrics")
+def metrics():
+    return {
+        "token_cache": token_cache.stats(),
+        "coalescing": dict(coalesce_stats),
+        "upstreams": upstream.stats(),
+        "rate_limit": dict(ratelimit.stats),
+    }
+
+
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailer",
+    "transfer-encoding",
+    "upgrade",
+}
+FORWARDED_RESPONSE_HEADERS = ("etag",)
+
+
+async def stream_response(request):
+    response = await upstream.send(request, stream=True)
+    headers = {
+        key: value
+        for key, value in response.headers.items()
+        if key.lower() not in HOP_BY_HOP_HEADERS
+    }
+    return StreamingResponse(
+        response.aiter_raw(),
+        status_code=response.status_code,
+        headers=headers,
+        background=BackgroundTask(response.aclose),
+    )
+
+
 async def make_request(
     method,
     url,
@@ -31,36 +101,104 @@ async def make_request(
     params=None,
     data=None,
     json=None,
+    content=None,
+    headers=None,
+    response: Response = None,
+    passthrough=None,
 ):
+    if passthrough is None:
+        passthrough = settings.proxy_passthrough
     if current_user:
-        headers = {"email": current_user.email, "uid": str(current_user.id)}
+        headers = {
+            **(headers or {}),
+            "email": current_user.email,
+            "uid": str(current_user.id),
+        }
+    client = upstream.get_client(url)
+    if passthrough:
+        headers = {
+            **(headers or {}),
+            "Accept-Encoding": compression.accepted_encoding.get(),
+        }
+        request = client.build_request(
+            method,
+            url,
+            params=params,
+            data=data,
+            json=json,
+            content=content,
+            headers=headers,
+        )
+        return await stream_response(request)
+    if method == "GET" and settings.coalesce_requests:
+        key = (
+            url,
+            tuple(sorted((params or {}).items())),
+            tuple(sorted((headers or {}).items())),
+        )
+        upstream_response, response_data = await coalesce(
+            key, lambda: send_request(client, method, url, params, headers=headers)
+        )
     else:
-        headers = None
-    async with httpx.AsyncClient(follow_redirects=True, headers=headers) as client:
-        response = await client.request(
-            method, url, params=params, data=data, json=json
+        upstream_response, response_data = await send_request(
+            client,
+            method,
+            url,
+            params,
+            data=data,
+            json=json,
+            content=content,
+            headers=headers,
         )
-        if response.status_code == 204:
-            return response
-        if response.status_code >= 400:
-            raise HTTPException(status_code=response.status_code, detail=response.text)
-        response_data = response.json()
+    forwarded = {
+        name: upstream_response.headers[name]
+        for name in FORWARDED_RESPONSE_HEADERS
+        if name in upstream_response.headers
+    }
+    if upstream_response.status_code == 304:
+        return Response(status_code=304, headers=forwarded)
+    if upstream_response.status_code == 204:
+        return upstream_response
+    if response is not None:
+        response.headers.update(forwarded)
     return response_data
 
 
-@app.post("/users", response_model=dto_misc.UserSingleResponse[dto_users.UserResponse])
+async def send_request(client, method, url, params=None, **kwargs):
+    request = client.build_request(method, url, params=params, **kwargs)
+    response = await upstream.send(request)
+    if response.status_code >= 400:
+        raise HTTPException(status_code=response.status_code, detail=response.text)
+    if response.status_code in (204, 304):
+        return response, None
+    return response, orjson.loads(response.content)
+
+
+def conditional_headers(if_none_match: Optional[str]):
+    if if_none_match:
+        return {"if-none-match": if_none_match}
+    return None
+
+
+@app.post(
+    "/users",
+    response_model=dto_misc.UserSingleResponse[dto_users.UserResponse],
+    dependencies=[limited_ip],
+)
 async def create_user(user: dto_users.CreateUserRequest):
     response_data = await make_request("POST", f"{users_url}/users", json=user.dict())
     return response_data
 
 
 @app.post("/login", response_model=dto_misc.TokenResponse)
-async def login(user: OAuth2PasswordRequestForm = depends):
+async def login(request: Request, user: OAuth2PasswordRequestForm = depends):
+    await ratelimit.check("login", f"ip:{request.client.host}")
+    await ratelimit.check("login", f"account:{user.username.lower()}")
     response_data = await make_request("POST", f"{users_url}/login", data=user.__dict__)
     return response_data
 
 
-@app.get("/verify-email")
+@app.get("/verify-email", dependencies=[limited_ip])
 async def verify_email(token: int):
     params = {"token": token}
     response_data = await make_request(
@@ -69,7 +207,7 @@ async def verify_email(token: int):
     return response_data
 
 
-@app.get("/users/{id}/reset-password-request")
+@app.get("/users/{id}/reset-password-request", dependencies=[limited_ip])
 async def reset_password_request(id: int):
     params = {"id": id}
     response_data = await make_request(
@@ -78,7 +216,7 @@ async def reset_password_request(id: int):
     return response_data
 
 
-@app.get("/users/{id}/reset-password")
+@app.get("/users/{id}/reset-password", dependencies=[limited_ip])
 async def reset_password(id: int, token: int):
     params = {"id": id, "token": token}
     response_data = await make_request(
@@ -103,32 +241,97 @@ async def update_user(
     return response_data
 
 
-def custom_encoder(obj):
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-    return obj
+JSON_HEADERS = {"content-type": "application/json"}
 
 
 @app.post("/tasks", response_model=dto_misc.TaskSingleResponse[dto_tasks.TaskResponse])
 async def create_task(
-    task: dto_tasks.CreateTaskRequest, current_user: int = validated_user
+    request: Request,
+    task: dto_tasks.CreateTaskRequest,
+    current_user: int = validated_user,
 ):
-    json_data = json.dumps(task.dict(), default=custom_encoder)
+    if settings.proxy_passthrough:
+        return await make_request(
+            "POST",
+            f"{tasks_url}/tasks",
+            content=await request.body(),
+            headers=JSON_HEADERS,
+            current_user=current_user,
+        )
     response_data = await make_request(
-        "POST", f"{tasks_url}/tasks", data=json_data, current_user=current_user
+        "POST",
+        f"{tasks_url}/tasks",
+        content=orjson.dumps(task.dict()),
+        headers=JSON_HEADERS,
+        current_user=current_user,
     )
     return response_data
 
 
+@app.post("/tasks/bulk", response_model=dto_tasks.BulkResponse)
+async def create_tasks(
+    request: Request,
+    bulk: dto_tasks.BulkCreateRequest,
+    current_user: int = validated_user,
+):
+    return await forward_bulk(request, "POST", "/tasks/bulk", bulk, current_user)
+
+
+@app.put("/tasks/bulk", response_model=dto_tasks.BulkResponse)
+async def update_tasks(
+    request: Request,
+    bulk: dto_tasks.BulkUpdateRequest,
+    current_user: int = validated_user,
+):
+    return await forward_bulk(request, "PUT", "/tasks/bulk", bulk, current_user)
+
+
+@app.post("/tasks/bulk/delete", response_model=dto_tasks.BulkResponse)
+async def delete_tasks(
+    request: Request,
+    bulk: dto_tasks.BulkDeleteRequest,
+    current_user: int = validated_user,
+):
+    return await forward_bulk(request, "POST", "/tasks/bulk/delete", bulk, current_user)
+
+
+async def forward_bulk(request: Request, method: str, path: str, bulk, current_user):
+    if settings.proxy_passthrough:
+        content = await request.body()
+    else:
+        content = orjson.dumps(bulk.dict())
+    return await make_request(
+        method,
+        f"{tasks_url}{path}",
+        content=content,
+        headers=JSON_HEADERS,
+        current_user=current_user,
+    )
+
+
 @app.put(
     "/tasks/{id}", response_model=dto_misc.TaskSingleResponse[dto_tasks.TaskResponse]
 )
 async def update_task(
-    id: int, task: dto_tasks.UpdateTaskRequest, current_user: int = validated_user
+    request: Request,
+    id: int,
+    task: dto_tasks.UpdateTaskRequest,
+    current_user: int = validated_user,
 ):
-    json_data = json.dumps(task.dict(), default=custom_encoder)
+    if settings.proxy_passthrough:
+        return await make_request(
+            "PUT",
+            f"{tasks_url}/tasks/{id}",
+            content=await request.body(),
+            headers=JSON_HEADERS,
+            current_user=current_user,
+        )
     response_data = await make_request(
-        "PUT", f"{tasks_url}/tasks/{id}", data=json_data, current_user=current_user
+        "PUT",
+        f"{tasks_url}/tasks/{id}",
+        content=orjson.dumps(task.dict()),
+        headers=JSON_HEADERS,
+        current_user=current_user,
     )
     return response_data
 
@@ -136,16 +339,45 @@ async def update_task(
 @app.delete("/tasks/{id}")
 async def delete_task(id: int, current_user: int = validated_user):
     response = await make_request(
-        "DELETE", f"{tasks_url}/tasks/{id}", current_user=current_user
+        "DELETE",
+        f"{tasks_url}/tasks/{id}",
+        current_user=current_user,
+        passthrough=False,
     )
     if response.status_code == 204:
         return {"message": "successfully deleted task"}
 
 
-@app.get("/tasks", response_model=dto_misc.TaskMultipleResponse[dto_tasks.TaskResponse])
-async def get_tasks(current_user: int = validated_user):
+@app.get(
+    "/tasks",
+    response_model=dto_misc.TaskPageResponse[dto_tasks.TaskAttachmentsResponse],
+)
+async def get_tasks(
+    response: Response,
+    current_user: int = validated_user,
+    search: Optional[str] = None,
+    search_mode: Optional[str] = None,
+    sort: Optional[dto_tasks.TaskSort] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    include_attachments: Optional[bool] = None,
+    if_none_match: Optional[str] = optional_header,
+):
+    params = {
+        "search": search,
+        "search_mode": search_mode,
+        "sort": sort.value if sort else None,
+        "limit": limit,
+        "cursor": cursor,
+        "include_attachments": include_attachments,
+    }
     response_data = await make_request(
-        "GET", f"{tasks_url}/tasks", current_user=current_user
+        "GET",
+        f"{tasks_url}/tasks",
+        current_user=current_user,
+        params={key: value for key, value in params.items() if value is not None},
+        headers=conditional_headers(if_none_match),
+        response=response,
     )
     return response_data
 
@@ -170,11 +402,35 @@ async def get_similar_tasks(current_user: int = validated_user):
 
 
 @app.get(
-    "/tasks/{id}", response_model=dto_misc.TaskSingleResponse[dto_tasks.TaskResponse]
+    "/tasks/{id}",
+    response_model=dto_misc.TaskSingleResponse[dto_tasks.TaskAttachmentsResponse],
 )
-async def get_task(id: int, current_user: int = validated_user):
+async def get_task(
+    id: int,
+    response: Response,
+    current_user: int = validated_user,
+    include_attachments: Optional[bool] = None,
+    if_none_match: Optional[str] = optional_header,
+):
+    params = {"include_attachments": include_attachments}
     response_data = await make_request(
-        "GET", f"{tasks_url}/tasks/{id}", current_user=current_user
+        "GET",
+        f"{tasks_url}/tasks/{id}",
+        current_user=current_user,
+        params={key: value for key, value in params.items() if value is not None},
+        headers=conditional_headers(if_none_match),
+        response=response,
+    )
+    return response_data
+
+
+@app.get(
+    "/tasks/{task_id}/files",
+    response_model=dto_misc.FileMultipleResponse[dto_tasks.AttachmentResponse],
+)
+async def get_files(task_id: int, current_user: int = validated_user):
+    response_data = await make_request(
+        "GET", f"{tasks_url}/tasks/{task_id}/files", current_user=current_user
     )
     return response_data
 
@@ -232,3 +488,161 @@ async def get_day_report(current_user: int = validated_user):
         "GET", f"{tasks_url}/reports/day", current_user=current_user
     )
     return response_data
+
+
+@app.get(
+    "/reports/storage",
+    response_model=dto_misc.ReportSingleResponse[dto_reports.StorageReportResponse],
+)
+async def get_storage_report(current_user: int = validated_user):
+    response_data = await make_request(
+        "GET", f"{tasks_url}/reports/storage", current_user=current_user
+    )
+    return response_data
+
+
+async def limit_stream(request: Request, max_size: int):
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > max_size:
+            raise HTTPException(
+                status_code=413,
+                detail=f"file exceeds the maximum upload size of {max_size} bytes",
+            )
+        yield chunk
+
+
+@app.post("/tasks/{task_id}/file", status_code=201)
+async def upload_file(
+    task_id: int, request: Request, current_user: int = validated_user
+):
+    max_size = settings.max_upload_size
+    content_length = request.headers.get("content-length")
+    if content_length is not None and not content_length.isdigit():
+        raise HTTPException(status_code=400, detail="invalid Content-Length header")
+    if content_length and int(content_length) > max_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"file exceeds the maximum upload size of {max_size} bytes",
+        )
+    headers = {"content-type": request.headers.get("content-type", "")}
+    if content_length:
+        headers["content-length"] = content_length
+    response = await make_request(
+        "POST",
+        f"{tasks_url}/tasks/{task_id}/file",
+        content=limit_stream(request, max_size),
+        headers=headers,
+        current_user=current_user,
+        passthrough=True,
+    )
+    return response
+
+
+DOWNLOAD_REQUEST_HEADERS = ("range", "if-range", "if-none-match")
+
+
+@app.get("/tasks/{task_id}/file/{file_id}")
+async def download_file(
+    task_id: int, file_id: int, request: Request, current_user: int = validated_user
+):
+    headers = {
+        name: request.headers[name]
+        for name in DOWNLOAD_REQUEST_HEADERS
+        if name in request.headers
+    }
+    response = await make_request(
+        "GET",
+        f"{tasks_url}/tasks/{task_id}/file/{file_id}",
+        headers=headers,
+        current_user=current_user,
+        passthrough=True,
+    )
+    return response
+
+
+async def run_batch_item(client, semaphore, item: dto_batch.BatchItemRequest):
+    content, headers = None, None
+    if item.method in ("POST", "PUT"):
+        content, headers = orjson.dumps(item.body), JSON_HEADERS
+    async with semaphore:
+        try:
+            response = await client.request(
+                item.method,
+                item.path,
+                params=item.params,
+                content=content,
+                headers=headers,
+            )
+        except Exception:
+            return {"status": 502, "body": {"detail": "sub-request failed"}}
+    if not response.content:
+        return {"status": response.status_code, "body": None}
+    try:
+        body = orjson.loads(response.content)
+    except orjson.JSONDecodeError:
+        body = response.text
+    return {"status": response.status_code, "body": body}
+
+
+@app.post("/batch", response_model=dto_batch.BatchResponse)
+async def batch(
+    batch: dto_batch.BatchRequest,
+    request: Request,
+    current_user: int = validated_user,
+):
+    if len(batch.requests) > settings.batch_max_requests:
+        raise HTTPException(
+            status_code=422,
+            detail=f"a batch may contain at most {settings.batch_max_requests} requests",
+        )
+    admission.request_priority.set("batch")
+    semaphore = asyncio.Semaphore(settings.batch_concurrency)
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    headers = {
+        "Authorization": request.headers["Authorization"],
+        "Accept-Encoding": "identity",
+    }
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://gateway", headers=headers
+    ) as client:
+        responses = await asyncio.gather(
+            *(run_batch_item(client, semaphore, item) for item in batch.requests)
+        )
+    return {"responses": responses}
+
+
+DASHBOARD_REPORTS = {
+    "count": "report",
+    "average": "report",
+    "overdue": "report",
+    "max": "report",
+    "day": "reports",
+}
+
+
+async def fetch_section(path: str, key: str, current_user):
+    try:
+        response_data = await make_request(
+            "GET", f"{tasks_url}{path}", current_user=current_user, passthrough=False
+        )
+    except HTTPException:
+        return None
+    return response_data["data"][key]
+
+
+@app.get("/dashboard", response_model=dto_dashboard.DashboardResponse)
+async def get_dashboard(current_user: int = validated_user):
+    admission.request_priority.set("reports")
+    tasks, *reports = await asyncio.gather(
+        fetch_section("/tasks", "tasks", current_user),
+        *(
+            fetch_section(f"/reports/{name}", key, current_user)
+            for name, key in DASHBOARD_REPORTS.items()
+        ),
+    )
+    return {
+        "status": "success",
+        "data": {"tasks": tasks, "reports": dict(zip(DASHBOARD_REPORTS, reports))},
+    }
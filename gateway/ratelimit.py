@@ -0,0 +1,97 @@
+import math
+import time
+from collections import OrderedDict
+
+from config import settings
+from fastapi import HTTPException, status
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+TOKEN_BUCKET_SCRIPT = """
+redis.replicate_commands()
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "ts", tostring(now))
+redis.call("PEXPIRE", KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(retry_after)}
+"""
+
+redis_client = aioredis.Redis.from_url(
+    settings.redis_url,
+    socket_timeout=settings.rate_limit_redis_timeout,
+    socket_connect_timeout=settings.rate_limit_redis_timeout,
+)
+token_bucket = redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+stats = {"allowed": 0, "limited": 0, "fallback": 0}
+
+
+class LocalBuckets:
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.buckets = OrderedDict()
+
+    def take(self, key: str, capacity: int, rate: float, cost: int = 1):
+        now = time.monotonic()
+        tokens, ts = self.buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - ts) * rate)
+        retry_after = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            retry_after = (cost - tokens) / rate
+        self.buckets[key] = (tokens, now)
+        self.buckets.move_to_end(key)
+        while len(self.buckets) > self.max_size:
+            self.buckets.popitem(last=False)
+        return retry_after == 0, retry_after
+
+
+local_buckets = LocalBuckets(settings.rate_limit_local_max_keys)
+redis_down_until = 0.0
+
+
+async def take(key: str, capacity: int, rate: float):
+    global redis_down_until
+    if time.monotonic() >= redis_down_until:
+        try:
+            allowed, retry_after = await token_bucket(
+                keys=[f"ratelimit:{key}"], args=[capacity, rate, 1]
+            )
+            return bool(allowed), float(retry_after)
+        except (RedisError, OSError):
+            redis_down_until = time.monotonic() + settings.rate_limit_redis_backoff
+    stats["fallback"] += 1
+    return local_buckets.take(key, capacity, rate)
+
+
+async def check(route_class: str, identity: str):
+    if not settings.rate_limit_enabled:
+        return
+    capacity, period = settings.rate_limits[route_class]
+    allowed, retry_after = await take(
+        f"{route_class}:{identity}", capacity, capacity / period
+    )
+    if allowed:
+        stats["allowed"] += 1
+        return
+    stats["limited"] += 1
+    raise HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="too many requests",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
@@ -0,0 +1,23 @@
+import asyncio
+
+in_flight = {}
+stats = {"leaders": 0, "collapsed": 0}
+
+
+def forget(key, task):
+    if in_flight.get(key) is task:
+        del in_flight[key]
+    if not task.cancelled():
+        task.exception()
+
+
+async def coalesce(key, send):
+    task = in_flight.get(key)
+    if task is None:
+        stats["leaders"] += 1
+        task = asyncio.ensure_future(send())
+        in_flight[key] = task
+        task.add_done_callback(lambda done: forget(key, done))
+    else:
+        stats["collapsed"] += 1
+    return await asyncio.shield(task)
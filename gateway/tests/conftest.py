@@ -0,0 +1,269 @@
+import asyncio
+import os
+import socket
+import threading
+import time
+
+for key, value in {
+    "url": "http://localhost:8000",
+    "users_service_url": "http://users:8000",
+    "tasks_service_url": "http://tasks:8000",
+    "secret_key": "test-secret-key",
+    "algorithm": "HS256",
+    "access_token_expire_time": "30",
+    "mail_username": "test",
+    "mail_password": "test",
+    "mail_from": "test@example.com",
+    "mail_port": "587",
+    "mail_server": "localhost",
+    "mail_tls": "False",
+    "mail_ssl": "False",
+    "use_credentials": "False",
+    "google_client_id": "test",
+    "google_client_secret": "test",
+    "redirect_url": "http://localhost:8000/login/google/callback",
+    "cache_expiry_time": "60",
+    "redis_url": "redis://127.0.0.1:1/0",
+    "rate_limit_enabled": "False",
+}.items():
+    os.environ.setdefault(key, value)
+
+import httpx  # noqa: E402
+import main  # noqa: E402
+import orjson  # noqa: E402
+import pytest  # noqa: E402
+import upstream  # noqa: E402
+import uvicorn  # noqa: E402
+import zstandard  # noqa: E402
+from config import settings  # noqa: E402
+from fastapi import FastAPI, Header, Request, Response  # noqa: E402
+from fastapi.middleware.gzip import GZipMiddleware  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from main import app  # noqa: E402
+from utils import create_access_token  # noqa: E402
+
+header = Header(...)
+optional_header = Header(None)
+
+
+@pytest.fixture
+def upstream_app():
+    stand_in = FastAPI()
+    stand_in.add_middleware(GZipMiddleware, minimum_size=1024)
+    stand_in.state.calls = []
+    stand_in.state.delay = 0
+    stand_in.state.failures = 0
+    stand_in.state.etag = 'W/"v1"'
+    stand_in.state.task_count = 1
+    stand_in.state.next_cursor = None
+
+    @stand_in.get("/tasks")
+    async def get_tasks(
+        request: Request,
+        response: Response,
+        email: str = header,
+        uid: str = header,
+        if_none_match: str = optional_header,
+    ):
+        stand_in.state.calls.append(("GET", "/tasks", email, uid))
+        stand_in.state.params = dict(request.query_params)
+        await asyncio.sleep(stand_in.state.delay)
+        if stand_in.state.failures:
+            stand_in.state.failures -= 1
+            return Response(status_code=503)
+        if if_none_match == stand_in.state.etag:
+            return Response(status_code=304, headers={"ETag": stand_in.state.etag})
+        response.headers["ETag"] = stand_in.state.etag
+        task = {
+            "id": 1,
+            "user_id": int(uid),
+            "title": "Test Task",
+            "description": "Test Task Description",
+            "is_completed": False,
+            "created_at": "2023-06-01T00:00:00+00:00",
+            "updated_at": "2023-06-01T00:00:00+00:00",
+            "due_date": None,
+            "completed_at": None,
+        }
+        tasks = [{**task, "id": i + 1} for i in range(stand_in.state.task_count)]
+        if request.query_params.get("include_attachments") == "true":
+            for task in tasks:
+                task["attachments"] = {"count": 1, "size": 10000}
+        return {
+            "status": "success",
+            "data": {"tasks": tasks},
+            "next_cursor": stand_in.state.next_cursor,
+        }
+
+    @stand_in.post("/tasks")
+    async def create_task(request: Request):
+        body = await request.body()
+        stand_in.state.calls.append(("POST", "/tasks", body, None))
+        return Response(
+            content=b'{"status": "created", "echo": ' + body + b"}",
+            status_code=201,
+            media_type="application/json",
+            headers={"x-upstream": "tasks"},
+        )
+
+    @stand_in.api_route("/tasks/bulk{suffix:path}", methods=["POST", "PUT"])
+    async def bulk(suffix: str, request: Request):
+        body = orjson.loads(await request.body())
+        path = f"/tasks/bulk{suffix}"
+        stand_in.state.calls.append((request.method, path, body, None))
+        ids = body.get("ids") or [task.get("id", 0) for task in body["tasks"]]
+        results = [{"id": id, "status": 200} for id in ids]
+        return {"status": "success", "data": {"results": results}}
+
+    @stand_in.post("/tasks/{task_id}/file", status_code=201)
+    async def upload_file(task_id: int, request: Request):
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+        stand_in.state.calls.append(("POST", f"/tasks/{task_id}/file", received, None))
+        return {"message": "successfully attached file", "size": received}
+
+    @stand_in.get("/tasks/{task_id}/files")
+    def get_files(task_id: int):
+        file = {
+            "id": 1,
+            "file_name": "notes.txt",
+            "content_type": "text/plain",
+            "size": 10000,
+            "sha256": "ab" * 32,
+            "created_at": "2023-06-01T00:00:00+00:00",
+            "file_attachment": "not part of the listing",
+        }
+        return {"status": "success", "data": {"files": [file]}}
+
+    @stand_in.get("/tasks/{task_id}/file/{file_id}")
+    def download_file(task_id: int, file_id: int, request: Request):
+        content = b"0123456789" * 1000
+        headers = {
+            "accept-ranges": "bytes",
+            "content-disposition": 'attachment; filename="notes.txt"',
+        }
+        media_type = "application/octet-stream" if file_id == 1 else "text/plain"
+        if file_id == 3 and "zstd" in request.headers.get("accept-encoding", ""):
+            headers["content-encoding"] = "zstd"
+            del headers["accept-ranges"]
+            return Response(
+                content=zstandard.ZstdCompressor().compress(content),
+                media_type=media_type,
+                headers=headers,
+            )
+        byte_range = request.headers.get("range")
+        if byte_range and request.headers.get("if-range", '"v1"') == '"v1"':
+            start, end = (int(part) for part in byte_range[6:].split("-"))
+            headers["content-range"] = f"bytes {start}-{end}/{len(content)}"
+            return Response(
+                content=content[start : end + 1],
+                status_code=206,
+                media_type=media_type,
+                headers=headers,
+            )
+        return Response(content=content, media_type=media_type, headers=headers)
+
+    @stand_in.get("/reports/{name}")
+    def get_report(name: str):
+        reports = {
+            "count": {"total_tasks": 3, "completed_tasks": 1, "incomplete_tasks": 2},
+            "average": {"average_tasks_completed_per_day": 1},
+            "overdue": {"overdue_tasks": 0},
+            "storage": {"logical_bytes": 50000, "stored_bytes": 8000},
+        }
+        if name == "day":
+            day = {"day_of_week": "Monday", "created_tasks": 3}
+            return {"status": "success", "data": {"reports": [day]}}
+        if name not in reports:
+            return Response(status_code=404)
+        return {"status": "success", "data": {"report": reports[name]}}
+
+    @stand_in.delete("/tasks/{id}")
+    def delete_task(id: int):
+        stand_in.state.calls.append(("DELETE", f"/tasks/{id}", None, None))
+        return Response(status_code=204)
+
+    return stand_in
+
+
+@pytest.fixture
+def client(upstream_app):
+    with TestClient(app) as client:
+        for url in list(upstream.clients):
+            upstream.clients[url] = httpx.AsyncClient(
+                app=upstream_app, follow_redirects=True
+            )
+        yield client
+
+
+@pytest.fixture
+def live_upstream(upstream_app, monkeypatch):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    url = f"http://127.0.0.1:{port}"
+    server = uvicorn.Server(
+        uvicorn.Config(upstream_app, host="127.0.0.1", port=port, log_level="error")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    monkeypatch.setattr(settings, "tasks_service_url", url)
+    monkeypatch.setattr(main, "tasks_url", url)
+    monkeypatch.setattr(settings, "retry_backoff", 0.001)
+    yield upstream_app
+    server.should_exit = True
+    thread.join()
+
+
+@pytest.fixture
+def live_client(live_upstream, token):
+    with TestClient(app) as client:
+        client.headers = {**client.headers, "Authorization": f"Bearer {token}"}
+        yield client
+
+
+@pytest.fixture
+def run_gateway(upstream_app, token):
+    def run(scenario):
+        async def main():
+            await upstream.open_clients()
+            for url in list(upstream.clients):
+                upstream.clients[url] = httpx.AsyncClient(app=upstream_app)
+            try:
+                async with httpx.AsyncClient(
+                    app=app,
+                    base_url="http://gateway",
+                    headers={"Authorization": f"Bearer {token}"},
+                    timeout=None,
+                ) as client:
+                    return await scenario(client)
+            finally:
+                await upstream.close_clients()
+
+        return asyncio.run(main())
+
+    return run
+
+
+@pytest.fixture
+def passthrough(monkeypatch):
+    monkeypatch.setattr(settings, "proxy_passthrough", True)
+
+
+@pytest.fixture
+def token():
+    return create_access_token({"user_email": "test@example.com", "user_id": 1})
+
+
+@pytest.fixture
+def authorized_client(client, token):
+    client.headers = {**client.headers, "Authorization": f"Bearer {token}"}
+    return client
+
+
+@pytest.fixture
+def tasks_url():
+    return settings.tasks_service_url
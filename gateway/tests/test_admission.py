@@ -0,0 +1,110 @@
+import asyncio
+
+import admission
+import pytest
+from admission import AdaptiveLimiter
+from fastapi import HTTPException
+
+
+def limiter(limit=1, queue_size=2, queue_timeout=1.0):
+    return AdaptiveLimiter(
+        limit,
+        min_limit=1,
+        max_limit=10,
+        queue_size=queue_size,
+        queue_timeout=queue_timeout,
+        latency_target=0.5,
+        backoff=0.5,
+    )
+
+
+def test_limit_adapts_to_latency():
+    async def scenario():
+        adaptive = limiter(limit=4)
+        await adaptive.acquire("crud")
+        adaptive.release(0.1, failed=False)
+        grown = adaptive.limit
+        await adaptive.acquire("crud")
+        adaptive.release(2.0, failed=False)
+        return grown, adaptive.limit
+
+    grown, shrunk = asyncio.run(scenario())
+    assert grown == 4.25
+    assert shrunk == 2.125
+
+
+def test_lowest_priority_shed_first():
+    async def scenario():
+        adaptive = limiter()
+        await adaptive.acquire("crud")
+        order = []
+
+        async def wait(priority):
+            try:
+                await adaptive.acquire(priority)
+                order.append(priority)
+            except HTTPException as e:
+                order.append(f"shed {priority}")
+                assert e.status_code == 503
+
+        waiters = [asyncio.create_task(wait(p)) for p in ("batch", "reports")]
+        await asyncio.sleep(0)
+        waiters.append(asyncio.create_task(wait("crud")))
+        await asyncio.sleep(0)
+        adaptive.release(0.1, failed=False)
+        await asyncio.sleep(0)
+        adaptive.release(0.1, failed=False)
+        await asyncio.gather(*waiters)
+        return order, adaptive.stats()
+
+    order, stats = asyncio.run(scenario())
+    assert order == ["shed batch", "crud", "reports"]
+    assert stats["shed"] == {"crud": 0, "reports": 0, "batch": 1}
+
+
+def test_newcomer_shed_when_queue_holds_higher_priority():
+    async def scenario():
+        adaptive = limiter(queue_size=1)
+        await adaptive.acquire("crud")
+        queued = asyncio.create_task(adaptive.acquire("crud"))
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException):
+            await adaptive.acquire("reports")
+        adaptive.release(0.1, failed=False)
+        await queued
+        return adaptive.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["shed"]["reports"] == 1
+    assert stats["in_flight"] == 1
+
+
+def test_queue_wait_bounded():
+    async def scenario():
+        adaptive = limiter(queue_timeout=0.01)
+        await adaptive.acquire("crud")
+        with pytest.raises(HTTPException):
+            await adaptive.acquire("crud")
+        return adaptive.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["queued"] == 0
+    assert stats["shed"]["crud"] == 1
+
+
+def test_priority_from_path_and_context():
+    assert admission.priority_for("/reports/count") == "reports"
+    assert admission.priority_for("/tasks") == "crud"
+
+    async def in_batch():
+        admission.request_priority.set("batch")
+        return admission.priority_for("/tasks")
+
+    assert asyncio.run(in_batch()) == "batch"
+
+
+def test_admission_stats_exposed(authorized_client, tasks_url):
+    authorized_client.get("/tasks")
+    stats = authorized_client.get("/metrics").json()["upstreams"][tasks_url]
+    assert stats["admission"]["in_flight"] == 0
+    assert stats["admission"]["limit"] > 20
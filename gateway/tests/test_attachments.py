@@ -0,0 +1,128 @@
+import tracemalloc
+
+from config import settings
+
+CHUNK = b"x" * 64 * 1024
+
+
+def chunks(count):
+    for _ in range(count):
+        yield CHUNK
+
+
+def test_upload_streamed_to_upstream(authorized_client, upstream_app):
+    response = authorized_client.post(
+        "/tasks/1/file",
+        content=chunks(16),
+        headers={"content-type": "multipart/form-data; boundary=x"},
+    )
+    assert response.status_code == 201
+    assert upstream_app.state.calls == [
+        ("POST", "/tasks/1/file", 16 * len(CHUNK), None)
+    ]
+
+
+def test_upload_rejected_by_content_length(
+    authorized_client, upstream_app, monkeypatch
+):
+    monkeypatch.setattr(settings, "max_upload_size", 1024)
+    response = authorized_client.post("/tasks/1/file", content=b"x" * 2048)
+    assert response.status_code == 413
+    assert upstream_app.state.calls == []
+
+
+def test_upload_invalid_content_length(authorized_client, upstream_app):
+    response = authorized_client.post(
+        "/tasks/1/file", content=b"x", headers={"Content-Length": "abc"}
+    )
+    assert response.status_code == 400
+    assert upstream_app.state.calls == []
+
+
+def test_upload_rejected_mid_stream(authorized_client, monkeypatch):
+    monkeypatch.setattr(settings, "max_upload_size", 4 * len(CHUNK))
+    response = authorized_client.post("/tasks/1/file", content=chunks(16))
+    assert response.status_code == 413
+
+
+def test_download_streamed_from_upstream(authorized_client):
+    response = authorized_client.get("/tasks/1/file/1")
+    assert response.status_code == 200
+    assert response.content == b"0123456789" * 1000
+    assert response.headers["content-disposition"] == (
+        'attachment; filename="notes.txt"'
+    )
+
+
+def test_files_listed(authorized_client):
+    response = authorized_client.get("/tasks/1/files")
+    assert response.status_code == 200
+    assert response.json()["data"]["files"] == [
+        {
+            "id": 1,
+            "file_name": "notes.txt",
+            "content_type": "text/plain",
+            "size": 10000,
+            "sha256": "ab" * 32,
+            "created_at": "2023-06-01T00:00:00+00:00",
+        }
+    ]
+
+
+def test_attachment_summary_forwarded(authorized_client, upstream_app):
+    upstream_app.state.task_count = 2
+    response = authorized_client.get("/tasks", params={"include_attachments": True})
+    assert upstream_app.state.params == {"include_attachments": "true"}
+    tasks = response.json()["data"]["tasks"]
+    assert [task["attachments"] for task in tasks] == [
+        {"count": 1, "size": 10000},
+        {"count": 1, "size": 10000},
+    ]
+
+
+def test_storage_report(authorized_client):
+    response = authorized_client.get("/reports/storage")
+    assert response.json()["data"]["report"] == {
+        "logical_bytes": 50000,
+        "stored_bytes": 8000,
+    }
+
+
+def test_download_range_forwarded(authorized_client):
+    response = authorized_client.get(
+        "/tasks/1/file/1", headers={"Range": "bytes=10-19", "If-Range": '"v1"'}
+    )
+    assert response.status_code == 206
+    assert response.headers["content-range"] == "bytes 10-19/10000"
+    assert response.headers["content-length"] == "10"
+    assert response.content == b"0123456789"
+
+
+def test_download_stale_if_range_gets_whole_file(authorized_client):
+    response = authorized_client.get(
+        "/tasks/1/file/1", headers={"Range": "bytes=10-19", "If-Range": '"v0"'}
+    )
+    assert response.status_code == 200
+    assert len(response.content) == 10000
+
+
+def test_upload_memory_stays_bounded(run_gateway, monkeypatch):
+    size = 256 * 1024 * 1024
+    monkeypatch.setattr(settings, "max_upload_size", size)
+
+    async def body():
+        for chunk in chunks(size // len(CHUNK)):
+            yield chunk
+
+    async def upload(client):
+        return await client.post("/tasks/1/file", content=body())
+
+    tracemalloc.start()
+    try:
+        response = run_gateway(upload)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert response.status_code == 201
+    assert response.json()["size"] == size
+    assert peak < 16 * 1024 * 1024
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+from config import settings
+
+
+def test_batch_runs_sub_requests(run_gateway):
+    async def scenario(client):
+        return await client.post(
+            "/batch",
+            json={
+                "requests": [
+                    {"path": "/tasks"},
+                    {"method": "delete", "path": "/tasks/1"},
+                    {"path": "/tasks/999"},
+                ]
+            },
+        )
+
+    response = run_gateway(scenario)
+    assert response.status_code == 200
+    first, second, third = response.json()["responses"]
+    assert first["status"] == 200
+    assert first["body"]["data"]["tasks"][0]["title"] == "Test Task"
+    assert second == {
+        "status": 200,
+        "body": {"message": "successfully deleted task"},
+    }
+    assert third["status"] == 405
+
+
+def test_batch_concurrency_capped(run_gateway, upstream_app, monkeypatch):
+    monkeypatch.setattr(settings, "batch_concurrency", 2)
+    monkeypatch.setattr(settings, "coalesce_requests", False)
+    upstream_app.state.delay = 0.1
+
+    async def scenario(client):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        response = await client.post(
+            "/batch", json={"requests": [{"path": "/tasks"}] * 4}
+        )
+        return response, loop.time() - start
+
+    response, elapsed = run_gateway(scenario)
+    assert [item["status"] for item in response.json()["responses"]] == [200] * 4
+    assert elapsed >= 0.2
+
+
+def test_batch_requires_authentication(client):
+    response = client.post("/batch", json={"requests": [{"path": "/tasks"}]})
+    assert response.status_code == 401
+
+
+@pytest.mark.parametrize(
+    "path", ["/batch", "/batch/", "/batch?x=1", "/%62atch", "/tasks/../batch"]
+)
+def test_nested_batch_rejected(authorized_client, path):
+    response = authorized_client.post(
+        "/batch", json={"requests": [{"method": "POST", "path": path}]}
+    )
+    assert response.status_code == 422
+
+
+def test_batch_size_limited(authorized_client, monkeypatch):
+    monkeypatch.setattr(settings, "batch_max_requests", 2)
+    response = authorized_client.post(
+        "/batch", json={"requests": [{"path": "/tasks"}] * 3}
+    )
+    assert response.status_code == 422
@@ -0,0 +1,31 @@
+def test_bulk_create_forwarded(authorized_client, upstream_app):
+    tasks = [{"title": "first"}, {"title": "second", "description": "two"}]
+    response = authorized_client.post("/tasks/bulk", json={"tasks": tasks})
+    assert response.status_code == 200
+    method, path, body, _ = upstream_app.state.calls[0]
+    assert (method, path) == ("POST", "/tasks/bulk")
+    assert [task["title"] for task in body["tasks"]] == ["first", "second"]
+    assert len(response.json()["data"]["results"]) == 2
+
+
+def test_bulk_update_not_routed_as_single_update(authorized_client, upstream_app):
+    tasks = [{"id": 3, "title": "renamed"}, {"id": 4, "is_completed": True}]
+    response = authorized_client.put("/tasks/bulk", json={"tasks": tasks})
+    assert response.status_code == 200
+    assert upstream_app.state.calls[0][:2] == ("PUT", "/tasks/bulk")
+    results = response.json()["data"]["results"]
+    assert [result["id"] for result in results] == [3, 4]
+
+
+def test_bulk_delete_forwarded(authorized_client, upstream_app):
+    response = authorized_client.post("/tasks/bulk/delete", json={"ids": [1, 2]})
+    assert response.status_code == 200
+    assert upstream_app.state.calls == [
+        ("POST", "/tasks/bulk/delete", {"ids": [1, 2]}, None)
+    ]
+
+
+def test_duplicate_ids_rejected(authorized_client, upstream_app):
+    response = authorized_client.post("/tasks/bulk/delete", json={"ids": [1, 1]})
+    assert response.status_code == 422
+    assert upstream_app.state.calls == []
@@ -0,0 +1,99 @@
+import gzip
+
+import orjson
+import pytest
+import zstandard
+from compression import choose_encoding
+
+
+def get_raw(client, url, accept_encoding):
+    with client.stream("GET", url, headers={"Accept-Encoding": accept_encoding}) as r:
+        return r, b"".join(r.iter_raw())
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("gzip, zstd", "zstd"),
+        ("gzip", "gzip"),
+        ("zstd;q=0, gzip;q=0.5", "gzip"),
+        ("*", "zstd"),
+        ("br, identity", None),
+        ("", None),
+    ],
+)
+def test_choose_encoding(header, expected):
+    assert choose_encoding(header) == expected
+
+
+def test_large_response_compressed_with_zstd(authorized_client, upstream_app):
+    upstream_app.state.task_count = 200
+    response, raw = get_raw(authorized_client, "/tasks", "gzip, zstd")
+    assert response.headers["content-encoding"] == "zstd"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] == 'W/"v1"'
+    tasks = orjson.loads(zstandard.ZstdDecompressor().decompress(raw))["data"]
+    assert len(tasks["tasks"]) == 200
+
+
+def test_large_response_compressed_with_gzip(authorized_client, upstream_app):
+    upstream_app.state.task_count = 200
+    response, raw = get_raw(authorized_client, "/tasks", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(orjson.loads(gzip.decompress(raw))["data"]["tasks"]) == 200
+
+
+def test_small_response_left_uncompressed(authorized_client):
+    response, raw = get_raw(authorized_client, "/tasks", "gzip, zstd")
+    assert "content-encoding" not in response.headers
+    assert orjson.loads(raw)["data"]["tasks"][0]["title"] == "Test Task"
+
+
+def test_identity_client_never_gets_compressed_body(
+    authorized_client, upstream_app, passthrough
+):
+    upstream_app.state.task_count = 200
+    response, raw = get_raw(authorized_client, "/tasks", "identity")
+    assert "content-encoding" not in response.headers
+    assert len(orjson.loads(raw)["data"]["tasks"]) == 200
+
+
+def test_compressed_upstream_body_forwarded_as_is(
+    authorized_client, upstream_app, passthrough
+):
+    upstream_app.state.task_count = 200
+    response, raw = get_raw(authorized_client, "/tasks", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-length"] == str(len(raw))
+    assert len(orjson.loads(gzip.decompress(raw))["data"]["tasks"]) == 200
+
+
+def test_binary_download_not_compressed(authorized_client):
+    response, raw = get_raw(authorized_client, "/tasks/1/file/1", "zstd")
+    assert "content-encoding" not in response.headers
+    assert raw == b"0123456789" * 1000
+
+
+def test_ranged_text_download_not_compressed(authorized_client):
+    response, raw = get_raw(authorized_client, "/tasks/1/file/2", "zstd")
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "content-encoding" not in response.headers
+    assert raw == b"0123456789" * 1000
+
+
+def test_download_compressed_at_rest_passed_through(authorized_client, passthrough):
+    response, raw = get_raw(authorized_client, "/tasks/1/file/3", "zstd")
+    assert response.headers["content-encoding"] == "zstd"
+    assert response.headers["content-length"] == str(len(raw))
+    assert zstandard.ZstdDecompressor().decompress(raw) == b"0123456789" * 1000
+
+
+def test_streamed_response_compressed_incrementally(
+    authorized_client, upstream_app, passthrough
+):
+    upstream_app.state.task_count = 200
+    response, raw = get_raw(authorized_client, "/tasks", "zstd")
+    assert response.headers["content-encoding"] == "zstd"
+    assert "content-length" not in response.headers
+    body = zstandard.ZstdDecompressor().decompressobj().decompress(raw)
+    assert len(orjson.loads(body)["data"]["tasks"]) == 200
@@ -0,0 +1,22 @@
+def test_dashboard_combines_sections(authorized_client, upstream_app):
+    response = authorized_client.get("/dashboard")
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["tasks"][0]["title"] == "Test Task"
+    assert data["reports"]["count"]["total_tasks"] == 3
+    assert data["reports"]["day"] == [{"day_of_week": "Monday", "created_tasks": 3}]
+
+
+def test_failing_report_degrades_to_null(authorized_client):
+    response = authorized_client.get("/dashboard")
+    assert response.status_code == 200
+    reports = response.json()["data"]["reports"]
+    assert reports["max"] is None
+    assert reports["overdue"] == {"overdue_tasks": 0}
+
+
+def test_failing_tasks_degrade_to_null(authorized_client, upstream_app):
+    upstream_app.state.failures = 10
+    response = authorized_client.get("/dashboard")
+    assert response.status_code == 200
+    assert response.json()["data"]["tasks"] is None
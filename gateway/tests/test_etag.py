@@ -0,0 +1,23 @@
+def test_etag_forwarded_to_client(authorized_client):
+    response = authorized_client.get("/tasks")
+    assert response.status_code == 200
+    assert response.headers["etag"] == 'W/"v1"'
+
+
+def test_not_modified_when_tag_matches(authorized_client):
+    response = authorized_client.get("/tasks", headers={"If-None-Match": 'W/"v1"'})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == 'W/"v1"'
+
+
+def test_full_response_when_tag_stale(authorized_client, upstream_app):
+    upstream_app.state.etag = 'W/"v2"'
+    response = authorized_client.get("/tasks", headers={"If-None-Match": 'W/"v1"'})
+    assert response.status_code == 200
+    assert response.headers["etag"] == 'W/"v2"'
+
+
+def test_not_modified_in_passthrough_mode(authorized_client, passthrough):
+    response = authorized_client.get("/tasks", headers={"If-None-Match": 'W/"v1"'})
+    assert response.status_code == 304
@@ -0,0 +1,36 @@
+def test_page_params_forwarded(authorized_client, upstream_app):
+    upstream_app.state.next_cursor = "eyJpZCI6IDF9"
+    response = authorized_client.get(
+        "/tasks", params={"sort": "title", "limit": 10, "cursor": "abc"}
+    )
+    assert response.status_code == 200
+    assert upstream_app.state.params == {
+        "sort": "title",
+        "limit": "10",
+        "cursor": "abc",
+    }
+    assert response.json()["next_cursor"] == "eyJpZCI6IDF9"
+
+
+def test_search_mode_forwarded(authorized_client, upstream_app):
+    authorized_client.get(
+        "/tasks", params={"search": "milk", "search_mode": "fulltext"}
+    )
+    assert upstream_app.state.params == {"search": "milk", "search_mode": "fulltext"}
+
+
+def test_unset_page_params_not_forwarded(authorized_client, upstream_app):
+    response = authorized_client.get("/tasks")
+    assert upstream_app.state.params == {}
+    assert response.json()["next_cursor"] is None
+
+
+def test_descending_sort_forwarded(authorized_client, upstream_app):
+    authorized_client.get("/tasks", params={"sort": "-created_at"})
+    assert upstream_app.state.params == {"sort": "-created_at"}
+
+
+def test_unknown_sort_rejected(authorized_client, upstream_app):
+    response = authorized_client.get("/tasks", params={"sort": "user_id"})
+    assert response.status_code == 422
+    assert upstream_app.state.calls == []
@@ -0,0 +1,27 @@
+def test_response_streamed_verbatim(authorized_client, passthrough):
+    response = authorized_client.get("/tasks")
+    assert response.status_code == 200
+    assert response.json()["data"]["tasks"][0]["title"] == "Test Task"
+    assert response.headers["content-type"] == "application/json"
+
+
+def test_request_body_forwarded_as_is(authorized_client, upstream_app, passthrough):
+    body = b'{"title": "raw title",   "description": "kept as sent"}'
+    response = authorized_client.post(
+        "/tasks", content=body, headers={"content-type": "application/json"}
+    )
+    assert response.status_code == 201
+    assert response.headers["x-upstream"] == "tasks"
+    assert upstream_app.state.calls == [("POST", "/tasks", body, None)]
+    assert response.content == b'{"status": "created", "echo": ' + body + b"}"
+
+
+def test_request_body_still_validated(authorized_client, upstream_app, passthrough):
+    response = authorized_client.post("/tasks", json={"description": "no title"})
+    assert response.status_code == 422
+    assert upstream_app.state.calls == []
+
+
+def test_delete_keeps_gateway_message(authorized_client, passthrough):
+    response = authorized_client.delete("/tasks/1")
+    assert response.json() == {"message": "successfully deleted task"}
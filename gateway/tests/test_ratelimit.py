@@ -0,0 +1,65 @@
+import asyncio
+
+import fakeredis
+import pytest
+import ratelimit
+from config import settings
+
+
+@pytest.fixture
+def rate_limits(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    monkeypatch.setattr(ratelimit, "local_buckets", ratelimit.LocalBuckets(100))
+    monkeypatch.setattr(ratelimit, "redis_down_until", 0.0)
+    limits = dict(settings.rate_limits)
+    monkeypatch.setattr(settings, "rate_limits", limits)
+    return limits
+
+
+def test_user_limited_with_retry_after(authorized_client, rate_limits):
+    rate_limits["read"] = (2, 60)
+    assert authorized_client.get("/tasks").status_code == 200
+    assert authorized_client.get("/tasks").status_code == 200
+    response = authorized_client.get("/tasks")
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "30"
+
+
+def test_route_classes_limited_separately(authorized_client, rate_limits):
+    rate_limits["read"] = (1, 60)
+    assert authorized_client.get("/tasks").status_code == 200
+    assert authorized_client.get("/tasks").status_code == 429
+    assert authorized_client.delete("/tasks/1").status_code == 200
+
+
+def test_login_limited_per_account(client, rate_limits):
+    rate_limits["login"] = (1, 60)
+    form = {"username": "Test@Example.com", "password": "wrong"}
+    assert client.post("/login", data=form).status_code != 429
+    form["username"] = "test@example.com"
+    assert client.post("/login", data=form).status_code == 429
+
+
+def test_falls_back_to_local_buckets(authorized_client, rate_limits):
+    rate_limits["read"] = (1, 60)
+    fallback = ratelimit.stats["fallback"]
+    authorized_client.get("/tasks")
+    assert authorized_client.get("/tasks").status_code == 429
+    assert ratelimit.stats["fallback"] - fallback == 2
+
+
+def test_token_bucket_script(monkeypatch):
+    script = fakeredis.aioredis.FakeRedis().register_script(
+        ratelimit.TOKEN_BUCKET_SCRIPT
+    )
+    monkeypatch.setattr(ratelimit, "token_bucket", script)
+    monkeypatch.setattr(ratelimit, "redis_down_until", 0.0)
+
+    async def take_three():
+        return [await ratelimit.take("read:user:1", 2, 1.0) for _ in range(3)]
+
+    first, second, third = asyncio.run(take_three())
+    assert first == (True, 0.0)
+    assert second == (True, 0.0)
+    assert third[0] is False
+    assert 0 < third[1] <= 1.0
@@ -0,0 +1,70 @@
+import httpx
+import upstream
+from config import settings
+from fastapi.testclient import TestClient
+from main import app
+from upstream import ReplicaSet
+
+REPLICAS = ["http://tasks-a:8000", "http://tasks-b:8000", "http://tasks-c:8000"]
+
+
+def test_least_outstanding_selected():
+    replica_set = ReplicaSet(REPLICAS, "least_outstanding")
+    replica_set.replicas[0].outstanding = 2
+    replica_set.replicas[1].outstanding = 1
+    replica_set.replicas[2].outstanding = 3
+    assert replica_set.select() is replica_set.replicas[1]
+
+
+def test_unhealthy_replica_skipped():
+    replica_set = ReplicaSet(REPLICAS, "least_outstanding")
+    replica_set.replicas[0].healthy = False
+    replica_set.replicas[1].outstanding = 1
+    assert replica_set.select() is replica_set.replicas[2]
+
+
+def test_user_affinity_is_stable_and_spread():
+    replica_set = ReplicaSet(REPLICAS, "user_affinity")
+    assignments = {uid: replica_set.select(str(uid)) for uid in range(300)}
+    assert all(replica_set.select(str(uid)) is assignments[uid] for uid in range(300))
+    assert len(set(assignments.values())) == 3
+
+
+def test_user_affinity_only_moves_users_of_failed_replica():
+    replica_set = ReplicaSet(REPLICAS, "user_affinity")
+    before = {uid: replica_set.select(str(uid)) for uid in range(300)}
+    failed = replica_set.replicas[0]
+    failed.healthy = False
+    after = {uid: replica_set.select(str(uid)) for uid in range(300)}
+    for uid, replica in before.items():
+        if replica is failed:
+            assert after[uid] is not failed
+        else:
+            assert after[uid] is replica
+
+
+def test_make_request_routes_to_replica(token, monkeypatch):
+    monkeypatch.setattr(settings, "tasks_service_replicas", REPLICAS)
+    monkeypatch.setattr(settings, "upstream_strategy", "user_affinity")
+    seen = []
+
+    def handler(request):
+        seen.append((request.url.host, request.headers["host"]))
+        return httpx.Response(200, json={"status": "success", "data": {"tasks": []}})
+
+    with TestClient(app) as client:
+        upstream.clients[settings.tasks_service_url] = httpx.AsyncClient(
+            transport=httpx.MockTransport(handler)
+        )
+        for _ in range(3):
+            response = client.get(
+                "/tasks", headers={"Authorization": f"Bearer {token}"}
+            )
+            assert response.status_code == 200
+        stats = client.get("/metrics").json()["upstreams"]
+    assert len(set(seen)) == 1
+    host, host_header = seen[0]
+    assert host_header == f"{host}:8000"
+    assert f"http://{host}:8000" in REPLICAS
+    requests = [r["requests"] for r in stats[settings.tasks_service_url]["replicas"]]
+    assert sorted(requests) == [0, 0, 3]
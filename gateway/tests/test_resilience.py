@@ -0,0 +1,67 @@
+import upstream
+from config import settings
+from fastapi.testclient import TestClient
+from main import app
+
+
+def breaker():
+    return upstream.breakers[settings.tasks_service_url]
+
+
+def test_idempotent_request_retried(live_client, live_upstream):
+    live_upstream.state.failures = 2
+    response = live_client.get("/tasks")
+    assert response.status_code == 200
+    assert len(live_upstream.state.calls) == 3
+    assert breaker().state == "closed"
+
+
+def test_retries_bounded(live_client, live_upstream):
+    live_upstream.state.failures = 10
+    response = live_client.get("/tasks")
+    assert response.status_code == 503
+    assert len(live_upstream.state.calls) == settings.max_retries + 1
+
+
+def test_retry_budget_exhausted(live_client, live_upstream):
+    budget = upstream.retry_budgets[settings.tasks_service_url]
+    budget.tokens = 0
+    live_upstream.state.failures = 1
+    response = live_client.get("/tasks")
+    assert response.status_code == 503
+    assert len(live_upstream.state.calls) == 1
+    assert budget.stats()["exhausted"] == 1
+
+
+def test_read_timeout(live_upstream, token, monkeypatch):
+    monkeypatch.setattr(settings, "tasks_service_read_timeout", 0.05)
+    monkeypatch.setattr(settings, "max_retries", 0)
+    live_upstream.state.delay = 0.5
+    with TestClient(app) as client:
+        response = client.get("/tasks", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 504
+
+
+def test_breaker_opens_and_fails_fast(live_client, live_upstream, monkeypatch):
+    monkeypatch.setattr(settings, "max_retries", 0)
+    live_upstream.state.failures = settings.breaker_failure_threshold
+    for _ in range(settings.breaker_failure_threshold):
+        assert live_client.get("/tasks").status_code == 503
+    calls = len(live_upstream.state.calls)
+    response = live_client.get("/tasks")
+    assert response.status_code == 503
+    assert "unavailable" in response.json()["detail"]
+    assert len(live_upstream.state.calls) == calls
+    stats = live_client.get("/metrics").json()["upstreams"][settings.tasks_service_url]
+    assert stats["breaker"]["state"] == "open"
+    assert stats["breaker"]["rejected"] == 1
+
+
+def test_breaker_half_open_trial_closes(live_client, live_upstream, monkeypatch):
+    monkeypatch.setattr(settings, "max_retries", 0)
+    breaker().record_failure()
+    breaker().state = "open"
+    breaker().opened_at -= settings.breaker_reset_timeout
+    response = live_client.get("/tasks")
+    assert response.status_code == 200
+    assert breaker().state == "closed"
@@ -0,0 +1,51 @@
+import asyncio
+
+import singleflight
+from config import settings
+from utils import create_access_token
+
+
+def test_identical_gets_share_one_upstream_call(run_gateway, upstream_app):
+    upstream_app.state.delay = 0.1
+    collapsed = singleflight.stats["collapsed"]
+
+    async def burst(client):
+        return await asyncio.gather(*(client.get("/tasks") for _ in range(5)))
+
+    responses = run_gateway(burst)
+    assert [response.status_code for response in responses] == [200] * 5
+    assert len({response.content for response in responses}) == 1
+    assert len(upstream_app.state.calls) == 1
+    assert singleflight.stats["collapsed"] - collapsed == 4
+    assert singleflight.in_flight == {}
+
+
+def test_different_users_not_coalesced(run_gateway, upstream_app):
+    upstream_app.state.delay = 0.1
+    other = create_access_token({"user_email": "other@example.com", "user_id": 2})
+
+    async def burst(client):
+        return await asyncio.gather(
+            client.get("/tasks"),
+            client.get("/tasks", headers={"Authorization": f"Bearer {other}"}),
+        )
+
+    run_gateway(burst)
+    assert sorted(call[3] for call in upstream_app.state.calls) == ["1", "2"]
+
+
+def test_sequential_gets_not_cached(authorized_client, upstream_app):
+    authorized_client.get("/tasks")
+    authorized_client.get("/tasks")
+    assert len(upstream_app.state.calls) == 2
+
+
+def test_coalescing_disabled(run_gateway, upstream_app, monkeypatch):
+    monkeypatch.setattr(settings, "coalesce_requests", False)
+    upstream_app.state.delay = 0.1
+
+    async def burst(client):
+        return await asyncio.gather(*(client.get("/tasks") for _ in range(3)))
+
+    run_gateway(burst)
+    assert len(upstream_app.state.calls) == 3
@@ -0,0 +1,56 @@
+import time
+
+import utils
+from dtos.dto_misc import TokenData
+from utils import TokenCache
+
+
+def test_hit_after_miss():
+    cache = TokenCache(2)
+    user = TokenData(email="test@example.com", id=1)
+    assert cache.get("token") is None
+    cache.set("token", user, time.time() + 60)
+    assert cache.get("token") == user
+    assert cache.stats() == {"size": 1, "max_size": 2, "hits": 1, "misses": 1}
+
+
+def test_least_recently_used_evicted():
+    cache = TokenCache(2)
+    expiry = time.time() + 60
+    for id in range(3):
+        if id == 2:
+            cache.get("token-0")
+        cache.set(f"token-{id}", TokenData(id=id), expiry)
+    assert cache.get("token-1") is None
+    assert cache.get("token-0").id == 0
+    assert cache.get("token-2").id == 2
+
+
+def test_expired_entry_not_accepted():
+    cache = TokenCache(2)
+    cache.set("token", TokenData(id=1), time.time() - 1)
+    assert cache.get("token") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_validate_user_uses_cache(authorized_client, monkeypatch):
+    calls = []
+    verify = utils.verify_access_token
+
+    def counting_verify(token, credentials_exception):
+        calls.append(token)
+        return verify(token, credentials_exception)
+
+    monkeypatch.setattr(utils, "token_cache", TokenCache(10))
+    monkeypatch.setattr(utils, "verify_access_token", counting_verify)
+    for _ in range(3):
+        assert authorized_client.get("/tasks").status_code == 200
+    assert len(calls) == 1
+    assert utils.token_cache.stats()["hits"] == 2
+
+
+def test_invalid_token_not_cached(client, monkeypatch):
+    monkeypatch.setattr(utils, "token_cache", TokenCache(10))
+    response = client.get("/tasks", headers={"Authorization": "Bearer invalid"})
+    assert response.status_code == 401
+    assert utils.token_cache.stats()["size"] == 0
@@ -0,0 +1,31 @@
+import upstream
+from config import settings
+from fastapi.testclient import TestClient
+from main import app
+
+
+def test_clients_open_on_startup(client):
+    assert set(upstream.clients) == {
+        settings.users_service_url,
+        settings.tasks_service_url,
+    }
+
+
+def test_client_reused_across_requests(authorized_client, upstream_app, tasks_url):
+    pooled = upstream.get_client(f"{tasks_url}/tasks")
+    for _ in range(3):
+        response = authorized_client.get("/tasks")
+        assert response.status_code == 200
+    assert upstream.get_client(f"{tasks_url}/tasks") is pooled
+    assert upstream_app.state.calls == [("GET", "/tasks", "test@example.com", "1")] * 3
+
+
+def test_identity_headers_not_shared(authorized_client, upstream_app):
+    authorized_client.get("/tasks")
+    assert "email" not in upstream.get_client(settings.tasks_service_url).headers
+
+
+def test_clients_closed_on_shutdown():
+    with TestClient(app):
+        assert upstream.clients
+    assert upstream.clients == {}
@@ -0,0 +1,353 @@
+import asyncio
+import bisect
+import hashlib
+import random
+import time
+
+import admission
+import httpx
+from config import settings
+from fastapi import HTTPException, status
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRYABLE_STATUS_CODES = {502, 503, 504}
+
+clients = {}
+breakers = {}
+retry_budgets = {}
+replica_sets = {}
+limiters = {}
+health_checks = []
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.times_opened = 0
+        self.rejected = 0
+
+    def allow_request(self):
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.rejected += 1
+                return False
+            self.state = "half_open"
+            self.trial_in_flight = False
+        if self.state == "half_open":
+            if self.trial_in_flight:
+                self.rejected += 1
+                return False
+            self.trial_in_flight = True
+        return True
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+
+class RetryBudget:
+    def __init__(self, ratio: float, max_tokens: float):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self.retries = 0
+        self.exhausted = 0
+
+    def deposit(self):
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self):
+        if self.tokens < 1:
+            self.exhausted += 1
+            return False
+        self.tokens -= 1
+        self.retries += 1
+        return True
+
+    def stats(self):
+        return {
+            "tokens": round(self.tokens, 2),
+            "retries": self.retries,
+            "exhausted": self.exhausted,
+        }
+
+
+class Replica:
+    def __init__(self, url: str):
+        self.url = httpx.URL(url)
+        self.healthy = True
+        self.outstanding = 0
+        self.requests = 0
+
+    def stats(self):
+        return {
+            "url": str(self.url),
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+        }
+
+
+class ReplicaSet:
+    def __init__(self, urls: list, strategy: str, virtual_nodes: int = 100):
+        self.replicas = [Replica(url) for url in urls]
+        self.strategy = strategy
+        self.ring = sorted(
+            (ring_hash(f"{replica.url}#{node}"), index)
+            for index, replica in enumerate(self.replicas)
+            for node in range(virtual_nodes)
+        )
+        self.ring_keys = [point for point, _ in self.ring]
+
+    def candidates(self, exclude):
+        healthy = [
+            replica
+            for replica in self.replicas
+            if replica.healthy and replica not in exclude
+        ]
+        return (
+            healthy or [r for r in self.replicas if r not in exclude] or self.replicas
+        )
+
+    def select(self, affinity_key: str = None, exclude=()):
+        candidates = self.candidates(exclude)
+        if self.strategy == "user_affinity" and affinity_key is not None:
+            start = bisect.bisect(self.ring_keys, ring_hash(affinity_key))
+            for offset in range(len(self.ring)):
+                _, index = self.ring[(start + offset) % len(self.ring)]
+                if self.replicas[index] in candidates:
+                    return self.replicas[index]
+        fewest = min(replica.outstanding for replica in candidates)
+        return random.choice(
+            [replica for replica in candidates if replica.outstanding == fewest]
+        )
+
+    def stats(self):
+        return [replica.stats() for replica in self.replicas]
+
+
+def ring_hash(key: str):
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+def upstream_replicas():
+    return {
+        settings.users_service_url: settings.users_service_replicas
+        or [settings.users_service_url],
+        settings.tasks_service_url: settings.tasks_service_replicas
+        or [settings.tasks_service_url],
+    }
+
+
+async def check_health(base_url: str):
+    replica_set = replica_sets[base_url]
+    while True:
+        await asyncio.sleep(settings.health_check_interval)
+        for replica in replica_set.replicas:
+            try:
+                response = await clients[base_url].get(
+                    str(replica.url.join(settings.health_check_path)),
+                    timeout=settings.health_check_timeout,
+                )
+                replica.healthy = response.status_code < 500
+            except httpx.HTTPError:
+                replica.healthy = False
+
+
+def route(request: httpx.Request, replica: Replica):
+    request.url = request.url.copy_with(
+        scheme=replica.url.scheme, host=replica.url.host, port=replica.url.port
+    )
+    request.headers["Host"] = replica.url.netloc.decode("ascii")
+
+
+def upstream_timeouts():
+    return {
+        settings.users_service_url: httpx.Timeout(
+            settings.users_service_read_timeout,
+            connect=settings.users_service_connect_timeout,
+        ),
+        settings.tasks_service_url: httpx.Timeout(
+            settings.tasks_service_read_timeout,
+            connect=settings.tasks_service_connect_timeout,
+        ),
+    }
+
+
+def create_client(timeout: httpx.Timeout):
+    limits = httpx.Limits(
+        max_connections=settings.upstream_max_connections,
+        max_keepalive_connections=settings.upstream_max_keepalive_connections,
+        keepalive_expiry=settings.upstream_keepalive_expiry,
+    )
+    return httpx.AsyncClient(
+        follow_redirects=True,
+        limits=limits,
+        timeout=timeout,
+        http2=settings.upstream_http2,
+    )
+
+
+async def open_clients():
+    for url, timeout in upstream_timeouts().items():
+        if url not in clients:
+            clients[url] = create_client(timeout)
+            breakers[url] = CircuitBreaker(
+                settings.breaker_failure_threshold, settings.breaker_reset_timeout
+            )
+            retry_budgets[url] = RetryBudget(
+                settings.retry_budget_ratio, settings.retry_budget_max_tokens
+            )
+            replica_sets[url] = ReplicaSet(
+                upstream_replicas()[url], settings.upstream_strategy
+            )
+            limiters[url] = admission.AdaptiveLimiter(
+                settings.admission_initial_limit,
+                settings.admission_min_limit,
+                settings.admission_max_limit,
+                settings.admission_queue_size,
+                settings.admission_queue_timeout,
+                settings.admission_latency_target,
+                settings.admission_backoff,
+            )
+            health_checks.append(asyncio.create_task(check_health(url)))
+
+
+async def close_clients():
+    for health_check in health_checks:
+        health_check.cancel()
+    health_checks.clear()
+    for client in clients.values():
+        await client.aclose()
+    clients.clear()
+    breakers.clear()
+    retry_budgets.clear()
+    replica_sets.clear()
+    limiters.clear()
+
+
+def get_base_url(url: str):
+    for base_url in clients:
+        if url.startswith(base_url):
+            return base_url
+    raise LookupError(f"no upstream client configured for {url}")
+
+
+def get_client(url: str):
+    return clients[get_base_url(url)]
+
+
+def backoff(attempt: int):
+    return random.uniform(0, settings.retry_backoff * 2**attempt)
+
+
+async def send(request: httpx.Request, stream: bool = False):
+    base_url = get_base_url(str(request.url))
+    client = clients[base_url]
+    breaker = breakers[base_url]
+    budget = retry_budgets[base_url]
+    replica_set = replica_sets[base_url]
+    limiter = limiters[base_url] if settings.admission_control_enabled else None
+    priority = admission.priority_for(request.url.path)
+    affinity_key = request.headers.get("uid")
+    retryable = request.method in IDEMPOTENT_METHODS
+    budget.deposit()
+    attempt = 0
+    tried = []
+    while True:
+        if not breaker.allow_request():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"upstream {base_url} is unavailable",
+            )
+        if limiter:
+            try:
+                await limiter.acquire(priority)
+            except BaseException:
+                breaker.trial_in_flight = False
+                raise
+        replica = replica_set.select(affinity_key, exclude=tried)
+        tried.append(replica)
+        route(request, replica)
+        replica.outstanding += 1
+        replica.requests += 1
+        started = time.monotonic()
+        response = None
+        error = None
+        try:
+            response = await client.send(request, stream=stream)
+        except httpx.TransportError as e:
+            error = e
+        finally:
+            replica.outstanding -= 1
+            if limiter:
+                failed = response is None or response.status_code >= 500
+                limiter.release(time.monotonic() - started, failed)
+            if response is None and error is None:
+                breaker.trial_in_flight = False
+        if error is not None:
+            breaker.record_failure()
+            replica.healthy = False
+            if retryable and attempt < settings.max_retries and budget.withdraw():
+                await asyncio.sleep(backoff(attempt))
+                attempt += 1
+                continue
+            if isinstance(error, httpx.TimeoutException):
+                raise HTTPException(
+                    status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                    detail=f"upstream {base_url} timed out",
+                ) from error
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"upstream {base_url} could not be reached",
+            ) from error
+        if response.status_code < 500:
+            breaker.record_success()
+            return response
+        breaker.record_failure()
+        if (
+            response.status_code in RETRYABLE_STATUS_CODES
+            and retryable
+            and attempt < settings.max_retries
+            and budget.withdraw()
+        ):
+            await response.aclose()
+            await asyncio.sleep(backoff(attempt))
+            attempt += 1
+            continue
+        return response
+
+
+def stats():
+    return {
+        base_url: {
+            "breaker": breakers[base_url].stats(),
+            "retry_budget": retry_budgets[base_url].stats(),
+            "replicas": replica_sets[base_url].stats(),
+            "admission": limiters[base_url].stats(),
+        }
+        for base_url in clients
+    }
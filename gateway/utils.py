@@ -1,4 +1,8 @@
+import hashlib
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from threading import Lock
 
 from config import settings
 from dtos.dto_misc import TokenData
@@ -24,6 +28,52 @@ google_sso = GoogleSSO(
 )
 
 
+class TokenCache:
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str):
+        key = hashlib.sha256(token.encode()).digest()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            token_data, expiry = entry
+            if expiry <= time.time():
+                del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return token_data
+
+    def set(self, token: str, token_data: TokenData, expiry: float):
+        if self.max_size <= 0:
+            return
+        key = hashlib.sha256(token.encode()).digest()
+        with self.lock:
+            self.entries[key] = (token_data, expiry)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+token_cache = TokenCache(settings.token_cache_size)
+
+
 def create_access_token(data: dict):
     try:
         to_encode = data.copy()
@@ -55,10 +105,15 @@ def verify_access_token(token: str, credentials_exception):
 
 
 def validate_user(token: str = oauth2):
+    cached_user = token_cache.get(token)
+    if cached_user:
+        return cached_user
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail=f'{"could not validate credentials"}',
         headers={"WWW-Authenticate": "Bearer"},
     )
     user = verify_access_token(token, credentials_exception)
+    expiry = jwt.get_unverified_claims(token)["exp"]
+    token_cache.set(token, user, expiry)
     return user
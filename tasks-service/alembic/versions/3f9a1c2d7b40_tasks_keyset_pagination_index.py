@@ -0,0 +1,29 @@
+# trunk-ignore(ruff/D400)
+# trunk-ignore(ruff/D415)
+"""tasks keyset pagination index
+
+Revision ID: 3f9a1c2d7b40
+Revises: 8c72116b038a
+Create Date: 2026-10-18 10:12:44.518203
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3f9a1c2d7b40"
+down_revision = "8c72116b038a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_tasks_user_id_due_date_id",
+        "tasks",
+        ["user_id", "due_date", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tasks_user_id_due_date_id", table_name="tasks")
@@ -0,0 +1,35 @@
+# trunk-ignore(ruff/D400)
+# trunk-ignore(ruff/D415)
+"""task quotas
+
+Revision ID: 5d2f8e6b3a17
+Revises: e4c8a92f1d63
+Create Date: 2026-10-18 12:21:09.447150
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5d2f8e6b3a17"
+down_revision = "e4c8a92f1d63"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "task_quotas",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("task_count", sa.Integer(), server_default="0", nullable=False),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    op.execute(
+        "INSERT INTO task_quotas (user_id, task_count) "
+        "SELECT user_id, COUNT(*) FROM tasks GROUP BY user_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("task_quotas")
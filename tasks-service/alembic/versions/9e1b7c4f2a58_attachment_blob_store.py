@@ -0,0 +1,101 @@
+# trunk-ignore(ruff/D400)
+# trunk-ignore(ruff/D415)
+"""attachment blob store
+
+Revision ID: 9e1b7c4f2a58
+Revises: 5d2f8e6b3a17
+Create Date: 2026-10-18 13:02:41.215836
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9e1b7c4f2a58"
+down_revision = "5d2f8e6b3a17"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "blobs",
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("refcount", sa.Integer(), server_default="0", nullable=False),
+        sa.Column(
+            "created_at",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("NOW()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("sha256"),
+    )
+    op.create_index(
+        "ix_blobs_unreferenced",
+        "blobs",
+        ["sha256"],
+        postgresql_where=sa.text("refcount = 0"),
+    )
+    op.add_column(
+        "attachments", sa.Column("blob_sha256", sa.String(length=64), nullable=True)
+    )
+    op.add_column("attachments", sa.Column("size", sa.BigInteger(), nullable=True))
+    op.add_column("attachments", sa.Column("content_type", sa.String(), nullable=True))
+    op.add_column(
+        "attachments",
+        sa.Column(
+            "created_at",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("NOW()"),
+            nullable=False,
+        ),
+    )
+    op.create_foreign_key(
+        "attachments_blob_sha256_fkey",
+        "attachments",
+        "blobs",
+        ["blob_sha256"],
+        ["sha256"],
+    )
+    op.create_index(op.f("ix_attachments_blob_sha256"), "attachments", ["blob_sha256"])
+    # Reference counts are kept by a trigger rather than by the application
+    # so that attachments removed by the tasks ON DELETE CASCADE are counted.
+    op.execute(
+        """
+        CREATE FUNCTION attachments_blob_refcount() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.blob_sha256 IS NOT NULL THEN
+                UPDATE blobs SET refcount = refcount - 1
+                WHERE sha256 = OLD.blob_sha256;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.blob_sha256 IS NOT NULL THEN
+                UPDATE blobs SET refcount = refcount + 1
+                WHERE sha256 = NEW.blob_sha256;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER attachments_blob_refcount "
+        "AFTER INSERT OR DELETE OR UPDATE OF blob_sha256 ON attachments "
+        "FOR EACH ROW EXECUTE FUNCTION attachments_blob_refcount()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER attachments_blob_refcount ON attachments")
+    op.execute("DROP FUNCTION attachments_blob_refcount()")
+    op.drop_index(op.f("ix_attachments_blob_sha256"), table_name="attachments")
+    op.drop_constraint(
+        "attachments_blob_sha256_fkey", "attachments", type_="foreignkey"
+    )
+    op.drop_column("attachments", "created_at")
+    op.drop_column("attachments", "content_type")
+    op.drop_column("attachments", "size")
+    op.drop_column("attachments", "blob_sha256")
+    op.drop_index("ix_blobs_unreferenced", table_name="blobs")
+    op.drop_table("blobs")
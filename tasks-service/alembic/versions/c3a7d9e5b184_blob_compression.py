@@ -0,0 +1,30 @@
+# trunk-ignore(ruff/D400)
+# trunk-ignore(ruff/D415)
+"""blob compression
+
+Revision ID: c3a7d9e5b184
+Revises: 9e1b7c4f2a58
+Create Date: 2026-10-18 14:37:52.603914
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c3a7d9e5b184"
+down_revision = "9e1b7c4f2a58"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("blobs", sa.Column("encoding", sa.String(), nullable=True))
+    op.add_column("blobs", sa.Column("stored_size", sa.BigInteger(), nullable=True))
+    op.execute("UPDATE blobs SET stored_size = size")
+    op.alter_column("blobs", "stored_size", nullable=False)
+
+
+def downgrade() -> None:
+    op.drop_column("blobs", "stored_size")
+    op.drop_column("blobs", "encoding")
@@ -0,0 +1,30 @@
+# trunk-ignore(ruff/D400)
+# trunk-ignore(ruff/D415)
+"""tasks sort key indexes
+
+Revision ID: e4c8a92f1d63
+Revises: b71e4d0c9a25
+Create Date: 2026-10-18 11:40:52.361087
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e4c8a92f1d63"
+down_revision = "b71e4d0c9a25"
+branch_labels = None
+depends_on = None
+
+SORT_KEYS = ("created_at", "updated_at", "title", "completed_at")
+
+
+def upgrade() -> None:
+    for key in SORT_KEYS:
+        op.create_index(
+            f"ix_tasks_user_id_{key}_id", "tasks", ["user_id", key, "id"], unique=False
+        )
+
+
+def downgrade() -> None:
+    for key in reversed(SORT_KEYS):
+        op.drop_index(f"ix_tasks_user_id_{key}_id", table_name="tasks")
@@ -0,0 +1,33 @@
+"""Delete attachment blobs that no attachment references any more.
+
+    python -m src.collect_blobs
+
+Reference counts are kept by a trigger on the attachments table, so blobs
+orphaned by a task's cascade delete are collected as well.
+"""
+import asyncio
+
+from src.config import settings
+from src.database import SessionLocal
+from src.logger import setup_logger
+from src.repository import blobs
+
+
+async def collect_all(batch_size: int = settings.blob_gc_batch_size):
+    collected = []
+    while True:
+        async with SessionLocal() as db:
+            digests = await blobs.collect_blobs(batch_size, db)
+        collected += digests
+        if len(digests) < batch_size:
+            return collected
+
+
+async def collect(logger):
+    collected = await collect_all()
+    if collected:
+        logger.info(f"collected {len(collected)} unreferenced attachment blobs")
+
+
+if __name__ == "__main__":
+    asyncio.run(collect(setup_logger(stream=True)))
@@ -0,0 +1,28 @@
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware as BaseGZipMiddleware
+from starlette.middleware.gzip import GZipResponder
+
+
+class RangeAwareGZipResponder(GZipResponder):
+    async def send_with_gzip(self, message):
+        await super().send_with_gzip(message)
+        if message["type"] == "http.response.start":
+            # Marking the response as already encoded is the only way to make
+            # Starlette skip it; gzipping a ranged download would break its
+            # Content-Range and Content-Length.
+            headers = Headers(raw=message["headers"])
+            if "accept-ranges" in headers:
+                self.content_encoding_set = True
+
+
+class GZipMiddleware(BaseGZipMiddleware):
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            headers = Headers(scope=scope)
+            if "gzip" in headers.get("Accept-Encoding", ""):
+                responder = RangeAwareGZipResponder(
+                    self.app, self.minimum_size, compresslevel=self.compresslevel
+                )
+                await responder(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
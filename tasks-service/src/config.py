@@ -19,6 +19,28 @@ class Settings(BaseSettings):
     use_credentials: bool
     max_tasks: int
     cache_expiry_time: int
+    blob_store_backend: str = "local"
+    blob_store_path: str = "/var/lib/tasks-service/blobs"
+    blob_chunk_size: int = 1024 * 1024
+    blob_compression: bool = False
+    blob_compression_level: int = 3
+    blob_compression_min_size: int = 1024
+    blob_compression_sample_size: int = 64 * 1024
+    blob_compression_max_ratio: float = 0.8
+    max_upload_size: int = 100 * 1024 * 1024
+    upload_spool_size: int = 1024 * 1024
+    log_body_max_size: int = 64 * 1024
+    blob_gc_interval: float = 600
+    blob_gc_batch_size: int = 500
+    quota_repair_interval: float = 0
+    quota_repair_batch_size: int = 500
+    bulk_max_tasks: int = 100
+    tasks_page_size: int = 50
+    tasks_max_page_size: int = 200
+    db_pool_size: int = 20
+    db_max_overflow: int = 10
+    gzip_minimum_size: int = 1024
+    gzip_level: int = 5
 
     class Config:
         env_file = ".env"
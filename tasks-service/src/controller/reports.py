@@ -2,12 +2,14 @@ import pickle
 
 import httpx
 from fastapi import APIRouter, Depends, Header, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.config import settings
 from src.database import get_db
 from src.dtos import dto_misc, dto_reports
 from src.handler import reports as handler
 from src.redis import redis_client
+from src.responses import serialize_row, serialize_rows
 
 router = APIRouter(prefix="/reports", tags=["Reports"])
 
@@ -28,21 +30,23 @@ get_user = Depends(get_current_user)
     status_code=status.HTTP_200_OK,
     response_model=dto_misc.ReportSingleResponse[dto_reports.CountReportResponse],
 )
-def count_tasks(
-    db: Session = get_db_session,
+async def count_tasks(
+    db: AsyncSession = get_db_session,
     current_user: dto_misc.CurrentUser = get_user,
 ):
     cache_key = f"task_count_report_user_{current_user.id}"
-    cache_data = redis_client.get(cache_key)
+    cache_data = await redis_client.get(cache_key)
     if cache_data:
         print("Cache Hit!")
         report = pickle.loads(cache_data)
     else:
         print("Cache Miss!!!")
-        report = handler.count_tasks(db, current_user)
-        redis_client.setex(cache_key, settings.cache_expiry_time, pickle.dumps(report))
-    response = {"status": "success", "data": {"report": report}}
-    return response
+        report = await handler.count_tasks(db, current_user)
+        await redis_client.setex(
+            cache_key, settings.cache_expiry_time, pickle.dumps(report)
+        )
+    report = serialize_row(report, dto_reports.CountReportResponse)
+    return ORJSONResponse({"status": "success", "data": {"report": report}})
 
 
 @router.get(
@@ -51,7 +55,7 @@ def count_tasks(
     response_model=dto_misc.ReportSingleResponse[dto_reports.AverageReportResponse],
 )
 async def average_tasks(
-    db: Session = get_db_session,
+    db: AsyncSession = get_db_session,
     current_user: dto_misc.CurrentUser = get_user,
 ):
     headers = {"email": current_user.email, "uid": str(current_user.id)}
@@ -62,14 +66,16 @@ async def average_tasks(
         current_user = response.json()
     current_user = dto_misc.UserResponse(**current_user)
     cache_key = f"task_average_report_user_{current_user.id}"
-    cache_data = redis_client.get(cache_key)
+    cache_data = await redis_client.get(cache_key)
     if cache_data:
         print("Cache Hit!")
         report = pickle.loads(cache_data)
     else:
         print("Cache Miss!!!")
-        report = handler.average_tasks(db, current_user)
-        redis_client.setex(cache_key, settings.cache_expiry_time, pickle.dumps(report))
+        report = await handler.average_tasks(db, current_user)
+        await redis_client.setex(
+            cache_key, settings.cache_expiry_time, pickle.dumps(report)
+        )
     response = {"status": "success", "data": {"report": report}}
     return response
 
@@ -79,21 +85,23 @@ async def average_tasks(
     status_code=status.HTTP_200_OK,
     response_model=dto_misc.ReportSingleResponse[dto_reports.OverdueReportResponse],
 )
-def overdue_tasks(
-    db: Session = get_db_session,
+async def overdue_tasks(
+    db: AsyncSession = get_db_session,
     current_user: dto_misc.CurrentUser = get_user,
 ):
     cache_key = f"task_overdue_report_user_{current_user.id}"
-    cache_data = redis_client.get(cache_key)
+    cache_data = await redis_client.get(cache_key)
     if cache_data:
         print("Cache Hit!")
         report = pickle.loads(cache_data)
     else:
         print("Cache Miss!!!")
-        report = handler.overdue_tasks(db, current_user)
-        redis_client.setex(cache_key, settings.cache_expiry_time, pickle.dumps(report))
-    response = {"status": "success", "data": {"report": report}}
-    return response
+        report = await handler.overdue_tasks(db, current_user)
+        await redis_client.setex(
+            cache_key, settings.cache_expiry_time, pickle.dumps(report)
+        )
+    report = serialize_row(report, dto_reports.OverdueReportResponse)
+    return ORJSONResponse({"status": "success", "data": {"report": report}})
 
 
 @router.get(
@@ -101,21 +109,23 @@ def overdue_tasks(
     status_code=status.HTTP_200_OK,
     response_model=dto_misc.ReportSingleResponse[dto_reports.DateMaxReportResponse],
 )
-def date_max_tasks(
-    db: Session = get_db_session,
+async def date_max_tasks(
+    db: AsyncSession = get_db_session,
     current_user: dto_misc.CurrentUser = get_user,
 ):
     cache_key = f"task_date_max_report_user_{current_user.id}"
-    cache_data = redis_client.get(cache_key)
+    cache_data = await redis_client.get(cache_key)
     if cache_data:
         print("Cache Hit!")
         report = pickle.loads(cache_data)
     else:
         print("Cache Miss!!!")
-        report = handler.date_max_tasks(db, current_user)
-        redis_client.setex(cache_key, settings.cache_expiry_time, pickle.dumps(report))
-    response = {"status": "success", "data": {"report": report}}
-    return response
+        report = await handler.date_max_tasks(db, current_user)
+        await redis_client.setex(
+            cache_key, settings.cache_expiry_time, pickle.dumps(report)
+        )
+    report = serialize_row(report, dto_reports.DateMaxReportResponse)
+    return ORJSONResponse({"status": "success", "data": {"report": report}})
 
 
 @router.get(
@@ -123,18 +133,44 @@ def date_max_tasks(
     status_code=status.HTTP_200_OK,
     response_model=dto_misc.ReportMultipleResponse[dto_reports.DayTasksReportResponse],
 )
-def day_of_week_tasks(
-    db: Session = get_db_session,
+async def day_of_week_tasks(
+    db: AsyncSession = get_db_session,
     current_user: dto_misc.CurrentUser = get_user,
 ):
     cache_key = f"task_day_of_week_report_user_{current_user.id}"
-    cache_data = redis_client.get(cache_key)
+    cache_data = await redis_client.get(cache_key)
     if cache_data:
         print("Cache Hit!")
         reports = pickle.loads(cache_data)
     else:
         print("Cache Miss!!!")
-        reports = handler.day_of_week_tasks(db, current_user)
-        redis_client.setex(cache_key, settings.cache_expiry_time, pickle.dumps(reports))
-    response = {"status": "success", "data": {"reports": reports}}
-    return response
+        reports = await handler.day_of_week_tasks(db, current_user)
+        await redis_client.setex(
+            cache_key, settings.cache_expiry_time, pickle.dumps(reports)
+        )
+    reports = serialize_rows(reports, dto_reports.DayTasksReportResponse)
+    return ORJSONResponse({"status": "success", "data": {"reports": reports}})
+
+
+@router.get(
+    "/storage",
+    status_code=status.HTTP_200_OK,
+    response_model=dto_misc.ReportSingleResponse[dto_reports.StorageReportResponse],
+)
+async def attachment_storage(
+    db: AsyncSession = get_db_session,
+    current_user: dto_misc.CurrentUser = get_user,
+):
+    cache_key = f"attachment_storage_report_user_{current_user.id}"
+    cache_data = await redis_client.get(cache_key)
+    if cache_data:
+        print("Cache Hit!")
+        report = pickle.loads(cache_data)
+    else:
+        print("Cache Miss!!!")
+        report = await handler.attachment_storage(db, current_user)
+        await redis_client.setex(
+            cache_key, settings.cache_expiry_time, pickle.dumps(report)
+        )
+    report = serialize_row(report, dto_reports.StorageReportResponse)
+    return ORJSONResponse({"status": "success", "data": {"report": report}})
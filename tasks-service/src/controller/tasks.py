@@ -1,18 +1,32 @@
-from typing import Optional
+from typing import Literal, Optional
 
 import httpx
-from fastapi import APIRouter, Depends, File, Header, HTTPException, UploadFile, status
-from sqlalchemy.orm import Session
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.config import settings
 from src.database import get_db
 from src.dtos import dto_misc, dto_tasks
 from src.handler import tasks as handler
+from src.responses import serialize_row, serialize_rows
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
 
 get_db_session = Depends(get_db)
 users_url = settings.users_service_url
 header = Header(...)
+optional_header = Header(None)
+page_size = Query(settings.tasks_page_size, ge=1, le=settings.tasks_max_page_size)
 
 
 def get_current_user(email: str = header, uid: str = header):
@@ -22,6 +36,15 @@ def get_current_user(email: str = header, uid: str = header):
 get_user = Depends(get_current_user)
 
 
+async def add_attachment_summaries(tasks: list, db: AsyncSession):
+    # One grouped query covers the whole page rather than one per task.
+    summaries = await handler.get_attachment_summaries(
+        [task["id"] for task in tasks], db
+    )
+    for task in tasks:
+        task["attachments"] = summaries[task["id"]]
+
+
 # Create Task Endpoint
 @router.post(
     "/",
@@ -30,11 +53,75 @@ get_user = Depends(get_current_user)
 )
 async def create_task(
     task_data: dto_tasks.CreateTaskRequest,
-    db: Session = get_db_session,
+    db: AsyncSession = get_db_session,
+    current_user: dto_misc.CurrentUser = get_user,
+):
+    task = await handler.create_task(task_data, db, current_user)
+    return ORJSONResponse(
+        {
+            "status": "successfully created task",
+            "data": {"task": serialize_row(task, dto_tasks.TaskResponse)},
+        },
+        status_code=status.HTTP_201_CREATED,
+    )
+
+
+# Bulk Create Tasks Endpoint
+@router.post(
+    "/bulk",
+    status_code=status.HTTP_200_OK,
+    response_model=dto_tasks.BulkResponse,
+)
+async def create_tasks(
+    bulk_data: dto_tasks.BulkCreateRequest,
+    db: AsyncSession = get_db_session,
+    current_user: dto_misc.CurrentUser = get_user,
+):
+    results = await handler.create_tasks(bulk_data, db, current_user)
+    return bulk_response(results)
+
+
+# Bulk Update Tasks Endpoint
+@router.put(
+    "/bulk",
+    status_code=status.HTTP_200_OK,
+    response_model=dto_tasks.BulkResponse,
+)
+async def update_tasks(
+    bulk_data: dto_tasks.BulkUpdateRequest,
+    db: AsyncSession = get_db_session,
+    current_user: dto_misc.CurrentUser = get_user,
+):
+    results = await handler.update_tasks(bulk_data, db, current_user)
+    return bulk_response(results)
+
+
+# Bulk Delete Tasks Endpoint
+@router.post(
+    "/bulk/delete",
+    status_code=status.HTTP_200_OK,
+    response_model=dto_tasks.BulkResponse,
+)
+async def delete_tasks(
+    bulk_data: dto_tasks.BulkDeleteRequest,
+    db: AsyncSession = get_db_session,
     current_user: dto_misc.CurrentUser = get_user,
 ):
-    task = handler.create_task(task_data, db, current_user)
-    return {"status": "successfully created task", "data": {"task": task}}
+    results = await handler.delete_tasks(bulk_data, db, current_user)
+    return bulk_response(results)
+
+
+def bulk_response(results):
+    results = [
+        {
+            "id": result["id"],
+            "status": result["status"],
+            "task": serialize_row(result.get("task"), dto_tasks.TaskResponse),
+            "detail": result.get("detail"),
+        }
+        for result in results
+    ]
+    return ORJSONResponse({"status": "success", "data": {"results": results}})
 
 
 # Update Task Endpoint
@@ -46,37 +133,70 @@ async def create_task(
 async def update_task(
     id: int,
     task_data: dto_tasks.UpdateTaskRequest,
-    db: Session = get_db_session,
+    db: AsyncSession = get_db_session,
     current_user: dto_misc.CurrentUser = get_user,
 ):
-    task = handler.update_task(id, task_data, db, current_user)
-    return {"status": "successfully updated task", "data": {"task": task}}
+    task = await handler.update_task(id, task_data, db, current_user)
+    return ORJSONResponse(
+        {
+            "status": "successfully updated task",
+            "data": {"task": serialize_row(task, dto_tasks.TaskResponse)},
+        }
+    )
 
 
 # Delete Task Endpoint
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_task(
     id: int,
-    db: Session = get_db_session,
+    db: AsyncSession = get_db_session,
     current_user: dto_misc.CurrentUser = get_user,
 ):
-    return handler.delete_task(id, db, current_user)
+    return await handler.delete_task(id, db, current_user)
 
 
 # Get Tasks Endpoint
 @router.get(
     "/",
     status_code=status.HTTP_200_OK,
-    response_model=dto_misc.TaskMultipleResponse[dto_tasks.TaskResponse],
+    response_model=dto_misc.TaskPageResponse[dto_tasks.TaskAttachmentsResponse],
 )
 async def get_tasks(
-    db: Session = get_db_session,
+    db: AsyncSession = get_db_session,
     current_user: dto_misc.CurrentUser = get_user,
     search: Optional[str] = "",
-    sort: Optional[str] = "due_date",
+    search_mode: Literal["contains", "fulltext"] = "contains",
+    sort: Optional[dto_tasks.TaskSort] = None,
+    limit: int = page_size,
+    cursor: Optional[str] = None,
+    include_attachments: bool = False,
+    if_none_match: Optional[str] = optional_header,
 ):
-    tasks = handler.get_tasks(db, current_user, search, sort)
-    return {"status": "success", "data": {"tasks": tasks}}
+    if sort is None:
+        sort = "rank" if search_mode == "fulltext" and search else "due_date"
+    else:
+        sort = sort.value
+    etag = await handler.get_tasks_etag(
+        db, current_user, search, sort, limit, cursor, search_mode, include_attachments
+    )
+    if handler.etag_matches(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+    tasks, next_cursor = await handler.get_tasks(
+        db, current_user, search, sort, limit, cursor, search_mode
+    )
+    data = serialize_rows(tasks, dto_tasks.TaskResponse)
+    if include_attachments:
+        await add_attachment_summaries(data, db)
+    return ORJSONResponse(
+        {
+            "status": "success",
+            "data": {"tasks": data},
+            "next_cursor": next_cursor,
+        },
+        headers={"ETag": etag},
+    )
 
 
 @router.get(
@@ -84,10 +204,10 @@ async def get_tasks(
     status_code=status.HTTP_200_OK,
 )
 async def get_tasks_and_user(
-    db: Session = get_db_session,
+    db: AsyncSession = get_db_session,
     current_user: dto_misc.CurrentUser = get_user,
 ):
-    tasks = handler.get_tasks(db, current_user)
+    tasks, _ = await handler.get_tasks(db, current_user)
     headers = {"email": current_user.email, "uid": str(current_user.id)}
     async with httpx.AsyncClient(headers=headers, follow_redirects=True) as client:
         response = await client.get(f"{users_url}/users")
@@ -103,26 +223,67 @@ async def get_tasks_and_user(
     response_model=dto_misc.TaskMultipleResponse[dto_tasks.SimilarTaskResponse],
 )
 async def get_similar_tasks(
-    db: Session = get_db_session,
+    db: AsyncSession = get_db_session,
     current_user: dto_misc.CurrentUser = get_user,
 ):
-    tasks = handler.get_similar_tasks(db, current_user)
-    return {"status": "similar tasks found", "data": {"tasks": tasks}}
+    tasks = await handler.get_similar_tasks(db, current_user)
+    return ORJSONResponse(
+        {
+            "status": "similar tasks found",
+            "data": {"tasks": serialize_rows(tasks, dto_tasks.SimilarTaskResponse)},
+        }
+    )
 
 
 # Get Task Endpoint
 @router.get(
     "/{id}",
     status_code=status.HTTP_200_OK,
-    response_model=dto_misc.TaskSingleResponse[dto_tasks.TaskResponse],
+    response_model=dto_misc.TaskSingleResponse[dto_tasks.TaskAttachmentsResponse],
 )
 async def get_task(
     id: int,
-    db: Session = get_db_session,
+    db: AsyncSession = get_db_session,
     current_user: dto_misc.CurrentUser = get_user,
+    include_attachments: bool = False,
+    if_none_match: Optional[str] = optional_header,
 ):
-    task = handler.get_task(id, db, current_user)
-    return {"status": "success", "data": {"task": task}}
+    task = await handler.get_task(id, db, current_user)
+    data = serialize_row(task, dto_tasks.TaskResponse)
+    if include_attachments:
+        await add_attachment_summaries([data], db)
+    etag = handler.make_etag(task.id, task.updated_at, data.get("attachments"))
+    if handler.etag_matches(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+    return ORJSONResponse(
+        {
+            "status": "success",
+            "data": {"task": data},
+        },
+        headers={"ETag": etag},
+    )
+
+
+# Get Task Files Endpoint
+@router.get(
+    "/{task_id}/files",
+    status_code=status.HTTP_200_OK,
+    response_model=dto_misc.FileMultipleResponse[dto_tasks.AttachmentResponse],
+)
+async def get_files(
+    task_id: int,
+    db: AsyncSession = get_db_session,
+    current_user: dto_misc.CurrentUser = get_user,
+):
+    files = await handler.get_files(task_id, db, current_user)
+    return ORJSONResponse(
+        {
+            "status": "success",
+            "data": {"files": serialize_rows(files, dto_tasks.AttachmentResponse)},
+        }
+    )
 
 
 file = File(...)
@@ -136,21 +297,37 @@ file = File(...)
 async def upload_file(
     task_id: int,
     file: UploadFile = file,
-    db: Session = get_db_session,
+    db: AsyncSession = get_db_session,
     current_user: dto_misc.CurrentUser = get_user,
 ):
     return await handler.upload_file(task_id, file, db, current_user)
 
 
+range_header = Header(None, alias="range")
+
+
 # Download File from Task Endpoint
 @router.get(
     "/{task_id}/file/{file_id}",
-    status_code=status.HTTP_202_ACCEPTED,
+    status_code=status.HTTP_200_OK,
 )
 async def download_file(
     task_id: int,
     file_id: int,
-    db: Session = get_db_session,
+    db: AsyncSession = get_db_session,
     current_user: dto_misc.CurrentUser = get_user,
+    range_header: Optional[str] = range_header,
+    if_range: Optional[str] = optional_header,
+    if_none_match: Optional[str] = optional_header,
+    accept_encoding: Optional[str] = optional_header,
 ):
-    return await handler.download_file(task_id, file_id, db, current_user)
+    return await handler.download_file(
+        task_id,
+        file_id,
+        db,
+        current_user,
+        range_header,
+        if_range,
+        if_none_match,
+        accept_encoding,
+    )
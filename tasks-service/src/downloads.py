@@ -0,0 +1,111 @@
+from typing import Optional
+from urllib.parse import quote
+
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+
+
+def content_disposition(file_name: str):
+    quoted = quote(file_name)
+    if quoted != file_name:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{file_name}"'
+
+
+def accepts_encoding(accept_encoding: Optional[str], encoding: str):
+    accepted = {}
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    return accepted.get(encoding, accepted.get("*", 0)) > 0
+
+
+# Returns (start, end) with end exclusive, or None when the header should be
+# ignored and the whole file sent, as RFC 9110 asks for malformed or
+# multi-range headers.
+def parse_range(range_header: str, size: int):
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, separator, last = (part.strip() for part in spec.partition("-"))
+    if not separator or not (first or last):
+        return None
+    if not all(part.isdigit() for part in (first, last) if part):
+        return None
+    if size == 0:
+        raise_not_satisfiable(size)
+    if not first:
+        if int(last) == 0:
+            raise_not_satisfiable(size)
+        return max(size - int(last), 0), size
+    start = int(first)
+    end = int(last) + 1 if last else size
+    if last and end <= start:
+        return None
+    if start >= size:
+        raise_not_satisfiable(size)
+    return start, min(end, size)
+
+
+def raise_not_satisfiable(size: int):
+    raise HTTPException(
+        status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+        detail=f'{"requested range not satisfiable"}',
+        headers={"Content-Range": f"bytes */{size}"},
+    )
+
+
+def file_response(
+    chunks,
+    size: int,
+    etag: str,
+    media_type: str,
+    file_name: str,
+    range_header: Optional[str] = None,
+    if_range: Optional[str] = None,
+    headers: Optional[dict] = None,
+):
+    headers = {
+        **(headers or {}),
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Content-Disposition": content_disposition(file_name),
+    }
+    # If-Range only matches the strong ETag exactly; a date or another tag
+    # means the file changed, so the whole file is sent.
+    byte_range = None
+    if range_header and (if_range is None or if_range.strip() == etag):
+        byte_range = parse_range(range_header, size)
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(
+            chunks(0, size), media_type=media_type, headers=headers
+        )
+    start, end = byte_range
+    headers["Content-Length"] = str(end - start)
+    headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+    return StreamingResponse(
+        chunks(start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=media_type,
+        headers=headers,
+    )
+
+
+def encoded_file_response(
+    chunks, stored_size: int, etag: str, media_type: str, file_name: str, encoding: str
+):
+    headers = {
+        "Content-Encoding": encoding,
+        "Content-Length": str(stored_size),
+        "ETag": etag,
+        "Vary": "Accept-Encoding",
+        "Content-Disposition": content_disposition(file_name),
+    }
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
@@ -53,6 +53,28 @@ class TaskMultipleResponse(BaseGenericResponse, Generic[M]):
         orm_mode = True
 
 
+class TaskPageResponse(BaseGenericResponse, Generic[M]):
+    data: TaskMultipleObjects[M]
+    next_cursor: Optional[str]
+
+    class Config:
+        orm_mode = True
+
+
+class FileMultipleObjects(GenericModel, Generic[M]):
+    files: List[M]
+
+    class Config:
+        orm_mode = True
+
+
+class FileMultipleResponse(BaseGenericResponse, Generic[M]):
+    data: FileMultipleObjects[M]
+
+    class Config:
+        orm_mode = True
+
+
 class ReportSingleObject(GenericModel, Generic[M]):
     report: M
 
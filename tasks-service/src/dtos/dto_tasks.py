@@ -1,7 +1,8 @@
 from datetime import datetime
-from typing import Optional
+from enum import Enum
+from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, validator
 
 
 class TaskBase(BaseModel):
@@ -37,6 +38,27 @@ class TaskResponse(TaskBase):
         orm_mode = True
 
 
+class AttachmentSummary(BaseModel):
+    count: int
+    size: int
+
+
+class TaskAttachmentsResponse(TaskResponse):
+    attachments: Optional[AttachmentSummary]
+
+
+class AttachmentResponse(BaseModel):
+    id: int
+    file_name: Optional[str]
+    content_type: Optional[str]
+    size: Optional[int]
+    sha256: Optional[str]
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
+
+
 class SimilarTaskResponse(BaseModel):
     title: str
     description: Optional[str]
@@ -44,3 +66,64 @@ class SimilarTaskResponse(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+def unique_ids(ids):
+    if len(set(ids)) != len(ids):
+        raise ValueError("each task id may appear only once")
+
+
+class BulkUpdateTaskRequest(UpdateTaskRequest):
+    id: int
+
+
+class BulkCreateRequest(BaseModel):
+    tasks: List[CreateTaskRequest]
+
+
+class BulkUpdateRequest(BaseModel):
+    tasks: List[BulkUpdateTaskRequest]
+
+    @validator("tasks")
+    def check_ids(cls, value):
+        unique_ids([task.id for task in value])
+        return value
+
+
+class BulkDeleteRequest(BaseModel):
+    ids: List[int]
+
+    @validator("ids")
+    def check_ids(cls, value):
+        unique_ids(value)
+        return value
+
+
+class BulkItemResponse(BaseModel):
+    id: Optional[int]
+    status: int
+    task: Optional[TaskResponse]
+    detail: Optional[str]
+
+
+class BulkResults(BaseModel):
+    results: List[BulkItemResponse]
+
+
+class BulkResponse(BaseModel):
+    status: str
+    data: BulkResults
+
+
+class TaskSort(str, Enum):
+    due_date = "due_date"
+    due_date_desc = "-due_date"
+    created_at = "created_at"
+    created_at_desc = "-created_at"
+    updated_at = "updated_at"
+    updated_at_desc = "-updated_at"
+    title = "title"
+    title_desc = "-title"
+    completed_at = "completed_at"
+    completed_at_desc = "-completed_at"
+    rank = "rank"
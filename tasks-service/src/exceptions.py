@@ -28,3 +28,7 @@ class MaxTasksReachedError(Exception):
 
 class NoCompleteTasksError(Exception):
     pass
+
+
+class InvalidCursorError(Exception):
+    pass
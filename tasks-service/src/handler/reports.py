@@ -1,12 +1,12 @@
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.exceptions import NoCompleteTasksError
 from src.repository import reports as repository
 
 
-def count_tasks(db: Session, current_user: int):
+async def count_tasks(db: AsyncSession, current_user: int):
     try:
-        count = repository.get_count_of_tasks(current_user.id, db)
+        count = await repository.get_count_of_tasks(current_user.id, db)
         return count
     except Exception:
         raise HTTPException(
@@ -15,9 +15,9 @@ def count_tasks(db: Session, current_user: int):
         ) from None
 
 
-def average_tasks(db: Session, current_user: int):
+async def average_tasks(db: AsyncSession, current_user: int):
     try:
-        average = repository.get_average_tasks(current_user, db)
+        average = await repository.get_average_tasks(current_user, db)
         return average
     except Exception:
         raise HTTPException(
@@ -26,9 +26,9 @@ def average_tasks(db: Session, current_user: int):
         ) from None
 
 
-def overdue_tasks(db: Session, current_user: int):
+async def overdue_tasks(db: AsyncSession, current_user: int):
     try:
-        overdue = repository.get_overdue_tasks(current_user.id, db)
+        overdue = await repository.get_overdue_tasks(current_user.id, db)
         return overdue
     except Exception:
         raise HTTPException(
@@ -37,9 +37,9 @@ def overdue_tasks(db: Session, current_user: int):
         ) from None
 
 
-def date_max_tasks(db: Session, current_user: int):
+async def date_max_tasks(db: AsyncSession, current_user: int):
     try:
-        max_date = repository.get_date_of_max_tasks_completed(current_user.id, db)
+        max_date = await repository.get_date_of_max_tasks_completed(current_user.id, db)
         return max_date
     except NoCompleteTasksError:
         raise HTTPException(
@@ -52,9 +52,9 @@ def date_max_tasks(db: Session, current_user: int):
         ) from None
 
 
-def day_of_week_tasks(db: Session, current_user: int):
+async def day_of_week_tasks(db: AsyncSession, current_user: int):
     try:
-        tasks_per_day = repository.get_days_of_week_with_tasks_created(
+        tasks_per_day = await repository.get_days_of_week_with_tasks_created(
             current_user.id, db
         )
         return tasks_per_day
@@ -67,3 +67,14 @@ def day_of_week_tasks(db: Session, current_user: int):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f'{"message: something went wrong while generating a report"}',
         ) from None
+
+
+async def attachment_storage(db: AsyncSession, current_user: int):
+    try:
+        storage = await repository.get_attachment_storage(current_user.id, db)
+        return storage
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f'{"message: something went wrong while generating a report"}',
+        ) from None
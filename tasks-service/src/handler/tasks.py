@@ -1,30 +1,35 @@
+import hashlib
 from datetime import datetime
 from typing import Optional
 from zoneinfo import ZoneInfo
 
 from fastapi import HTTPException, Response, UploadFile, status
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.config import settings
+from src.downloads import accepts_encoding, encoded_file_response, file_response
 from src.dtos import dto_tasks
 from src.exceptions import (
     CreateError,
     DeleteError,
     GetError,
+    InvalidCursorError,
     MaxTasksReachedError,
     UpdateError,
 )
 from src.models.tasks import Task
+from src.pagination import decode_cursor, encode_cursor
 from src.repository import tasks as repository
+from src.storage import blob_store, iterate_bytes
 
 
-def create_task(
+async def create_task(
     task_data: dto_tasks.CreateTaskRequest,
-    db: Session,
+    db: AsyncSession,
     current_user: int,
 ):
     try:
         task = Task(user_id=current_user.id, **task_data.dict())
-        new_task = repository.create_task(current_user.id, task, db)
+        new_task = await repository.create_task(current_user.id, task, db)
         return new_task
     except MaxTasksReachedError:
         raise HTTPException(
@@ -38,21 +43,25 @@ def create_task(
         ) from None
 
 
-def update_task(
-    id: int,
-    task_data: dto_tasks.UpdateTaskRequest,
-    db: Session,
-    current_user: int,
-):
+def stamp_completion(task_data: dto_tasks.UpdateTaskRequest):
     local_tz = ZoneInfo("Asia/Karachi")
     now_local = datetime.now(local_tz)
     if task_data.is_completed is True:
         task_data.completed_at = now_local
     if task_data.is_completed is False:
         task_data.completed_at = None
+
+
+async def update_task(
+    id: int,
+    task_data: dto_tasks.UpdateTaskRequest,
+    db: AsyncSession,
+    current_user: int,
+):
+    stamp_completion(task_data)
     try:
         task = Task(**task_data.dict())
-        updated_task = repository.update_task(id, task, db, current_user.id)
+        updated_task = await repository.update_task(id, task, db, current_user.id)
         return updated_task
     except UpdateError:
         raise HTTPException(
@@ -66,13 +75,13 @@ def update_task(
         ) from None
 
 
-def delete_task(
+async def delete_task(
     id: int,
-    db: Session,
+    db: AsyncSession,
     current_user: int,
 ):
     try:
-        repository.delete_task(id, db, current_user.id)
+        await repository.delete_task(id, db, current_user.id)
         return Response(status_code=status.HTTP_204_NO_CONTENT)
     except DeleteError:
         raise HTTPException(
@@ -86,15 +95,125 @@ def delete_task(
         ) from None
 
 
-def get_tasks(
-    db: Session,
+def check_bulk_size(count: int):
+    if count > settings.bulk_max_tasks:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"a bulk request may contain at most {settings.bulk_max_tasks} tasks",
+        )
+
+
+def not_found(id: int):
+    return {
+        "id": id,
+        "status": status.HTTP_401_UNAUTHORIZED,
+        "task": None,
+        "detail": f"not authorized to perform action or task with id: {id} does not exist",
+    }
+
+
+async def create_tasks(
+    bulk_data: dto_tasks.BulkCreateRequest,
+    db: AsyncSession,
+    current_user: int,
+):
+    check_bulk_size(len(bulk_data.tasks))
+    tasks = [
+        Task(user_id=current_user.id, **task_data.dict())
+        for task_data in bulk_data.tasks
+    ]
+    try:
+        new_tasks = await repository.create_tasks(current_user.id, tasks, db)
+    except MaxTasksReachedError:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f'{"message: maximum number of tasks reached"}',
+        ) from None
+    except CreateError:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f'{"message: something went wrong while creating the tasks"}',
+        ) from None
+    return [
+        {"id": task.id, "status": status.HTTP_201_CREATED, "task": task, "detail": None}
+        for task in new_tasks
+    ]
+
+
+async def update_tasks(
+    bulk_data: dto_tasks.BulkUpdateRequest,
+    db: AsyncSession,
+    current_user: int,
+):
+    check_bulk_size(len(bulk_data.tasks))
+    for task_data in bulk_data.tasks:
+        stamp_completion(task_data)
+    tasks = [Task(**task_data.dict()) for task_data in bulk_data.tasks]
+    try:
+        updated_tasks = await repository.update_tasks(current_user.id, tasks, db)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f'{"something went wrong while updating the tasks"}',
+        ) from None
+    updated = {task.id: task for task in updated_tasks}
+    return [
+        {"id": task.id, "status": status.HTTP_200_OK, "task": updated[task.id]}
+        if task.id in updated
+        else not_found(task.id)
+        for task in tasks
+    ]
+
+
+async def delete_tasks(
+    bulk_data: dto_tasks.BulkDeleteRequest,
+    db: AsyncSession,
+    current_user: int,
+):
+    check_bulk_size(len(bulk_data.ids))
+    try:
+        deleted_ids = await repository.delete_tasks(current_user.id, bulk_data.ids, db)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f'{"something went wrong while deleting the tasks"}',
+        ) from None
+    deleted = set(deleted_ids)
+    return [
+        {"id": id, "status": status.HTTP_204_NO_CONTENT}
+        if id in deleted
+        else not_found(id)
+        for id in bulk_data.ids
+    ]
+
+
+async def get_tasks(
+    db: AsyncSession,
     current_user: int,
     search: Optional[str] = "",
     sort: Optional[str] = "due_date",
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    search_mode: Optional[str] = "contains",
 ):
+    if sort == "rank" and (search_mode != "fulltext" or not search):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f'{"sorting by rank requires a fulltext search"}',
+        )
+    column, _ = repository.sort_column(sort, search)
     try:
-        tasks = repository.get_tasks(current_user.id, db, search, sort)
-        return tasks
+        after = decode_cursor(cursor, sort, column) if cursor else None
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f'{"invalid cursor"}',
+        ) from None
+    fetch = None if limit is None else limit + 1
+    try:
+        tasks = await repository.get_tasks(
+            current_user.id, db, search, sort, fetch, after, search_mode
+        )
     except GetError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail=f'{"there are no tasks"}'
@@ -104,14 +223,60 @@ def get_tasks(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f'{"something went wrong while retrieving the tasks"}',
         ) from None
+    if limit is None or len(tasks) <= limit:
+        return tasks, None
+    tasks = tasks[:limit]
+    last = tasks[-1]
+    value = getattr(last, sort.removeprefix("-"))
+    return tasks, encode_cursor(sort, value, last.id)
+
+
+def make_etag(*parts):
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in tags
+
+
+async def get_tasks_etag(
+    db: AsyncSession,
+    current_user: int,
+    search: Optional[str] = "",
+    sort: Optional[str] = "due_date",
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    search_mode: Optional[str] = "contains",
+    include_attachments: bool = False,
+):
+    try:
+        version = tuple(await repository.get_tasks_version(current_user.id, db))
+        if include_attachments:
+            version += tuple(
+                await repository.get_attachments_version(current_user.id, db)
+            )
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f'{"something went wrong while retrieving the tasks"}',
+        ) from None
+    return make_etag(
+        current_user.id, *version, search, search_mode, sort, limit, cursor
+    )
 
 
-def get_similar_tasks(
-    db: Session,
+async def get_similar_tasks(
+    db: AsyncSession,
     current_user: int,
 ):
     try:
-        tasks = repository.get_similar_tasks(current_user.id, db)
+        tasks = await repository.get_similar_tasks(current_user.id, db)
         return tasks
     except GetError:
         raise HTTPException(
@@ -125,13 +290,13 @@ def get_similar_tasks(
         ) from None
 
 
-def get_task(
+async def get_task(
     id: int,
-    db: Session,
+    db: AsyncSession,
     current_user: int,
 ):
     try:
-        task = repository.get_task(id, db, current_user.id)
+        task = await repository.get_task(id, db, current_user.id)
         return task
     except GetError:
         raise HTTPException(
@@ -145,14 +310,54 @@ def get_task(
         ) from None
 
 
+async def get_attachment_summaries(task_ids: list, db: AsyncSession):
+    if not task_ids:
+        return {}
+    try:
+        summaries = await repository.get_attachment_summaries(task_ids, db)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f'{"something went wrong while retrieving the attachments"}',
+        ) from None
+    empty = {"count": 0, "size": 0}
+    return {task_id: summaries.get(task_id, empty) for task_id in task_ids}
+
+
+async def get_files(
+    task_id: int,
+    db: AsyncSession,
+    current_user: int,
+):
+    try:
+        await repository.get_task(task_id, db, current_user.id)
+    except GetError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=f"not authorized to perform action or task with id: {task_id} does not exist",
+        ) from None
+    try:
+        return await repository.get_files(task_id, db)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f'{"something went wrong while retrieving the files"}',
+        ) from None
+
+
+async def read_chunks(file: UploadFile):
+    while chunk := await file.read(settings.blob_chunk_size):
+        yield chunk
+
+
 async def upload_file(
     task_id: int,
     file: UploadFile,
-    db: Session,
+    db: AsyncSession,
     current_user: int,
 ):
     try:
-        repository.get_task(task_id, db, current_user.id)
+        await repository.get_task(task_id, db, current_user.id)
     except GetError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -164,8 +369,19 @@ async def upload_file(
             detail=f'{"something went wrong while retrieving the task"}',
         ) from None
     file_name = file.filename
-    file_data = await file.read()
-    attachment = repository.create_file(task_id, file_name, file_data, db)
+    content_type = file.content_type or "application/octet-stream"
+    staged = await blob_store.stage(read_chunks(file), content_type)
+    try:
+        attachment = await repository.create_file(
+            task_id, file_name, content_type, staged, db
+        )
+    except CreateError:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f'{"something went wrong while attaching the file"}',
+        ) from None
+    finally:
+        await blob_store.discard(staged)
     return {
         "message": "successfully attached file",
         "file_name": f"{file_name}",
@@ -176,18 +392,22 @@ async def upload_file(
 async def download_file(
     task_id: int,
     file_id: int,
-    db: Session,
+    db: AsyncSession,
     current_user: int,
+    range_header: Optional[str] = None,
+    if_range: Optional[str] = None,
+    if_none_match: Optional[str] = None,
+    accept_encoding: Optional[str] = None,
 ):
     try:
-        repository.get_task(task_id, db, current_user.id)
+        await repository.get_task(task_id, db, current_user.id)
     except GetError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"not authorized to perform action or task with id: {task_id} does not exist",
         ) from None
     try:
-        file = repository.get_file(file_id, task_id, db)
+        file, blob = await repository.get_file(file_id, task_id, db)
     except FileNotFoundError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -198,10 +418,58 @@ async def download_file(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f'{"something went wrong while retrieving the file"}',
         ) from None
-    file_name = file.file_name
-    file_data = file.file_attachment
-    with open("temp_file", "wb") as f:
-        f.write(file_data)
-    return FileResponse(
-        path="temp_file", filename=file_name, media_type="application/octet-stream"
+    media_type = file.content_type or "application/octet-stream"
+    headers = {}
+    if blob is not None:
+        size = blob.size
+        digest = blob.sha256
+        encoding = blob.encoding
+
+        def chunks(start: int, end: int):
+            return blob_store.iterate(digest, start, end, encoding)
+
+        if encoding is not None:
+            headers["Vary"] = "Accept-Encoding"
+            # Without a Range the stored bytes can go out as they are and
+            # the client decompresses them.
+            if not range_header and accepts_encoding(accept_encoding, encoding):
+                etag = f'"{digest}-{encoding}"'
+                if etag_matches(if_none_match, etag):
+                    return Response(
+                        status_code=status.HTTP_304_NOT_MODIFIED,
+                        headers={"ETag": etag, **headers},
+                    )
+                return encoded_file_response(
+                    blob_store.iterate(digest, encoding=encoding, decode=False),
+                    blob.stored_size,
+                    etag,
+                    media_type,
+                    file.file_name,
+                    encoding,
+                )
+    else:
+        # Attachments not yet moved by src.migrate_blobs still hold their
+        # bytes in the row.
+        data = file.file_attachment
+        size = len(data)
+        digest = hashlib.sha256(data).hexdigest()
+
+        def chunks(start: int, end: int):
+            return iterate_bytes(data[start:end])
+
+    # Attachments are content-addressed, so the hash is a strong ETag.
+    etag = f'"{digest}"'
+    if etag_matches(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, **headers}
+        )
+    return file_response(
+        chunks,
+        size,
+        etag,
+        media_type,
+        file.file_name,
+        range_header,
+        if_range,
+        headers,
     )
@@ -2,7 +2,7 @@ import logging
 from logging.handlers import RotatingFileHandler
 
 
-def setup_logger():
+def setup_logger(stream: bool = False):
     logger = logging.getLogger("src.main")
     logger.setLevel(logging.DEBUG)
     file_handler = RotatingFileHandler("app.log", maxBytes=10000000, backupCount=5)
@@ -12,4 +12,8 @@ def setup_logger():
     )
     file_handler.setFormatter(formatter)
     logger.addHandler(file_handler)
+    if stream:
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(formatter)
+        logger.addHandler(stream_handler)
     return logger
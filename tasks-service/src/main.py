@@ -2,14 +2,22 @@ import os
 
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from src import periodic
+from src.collect_blobs import collect
+from src.compression import GZipMiddleware
+from src.config import settings
 from src.controller import reports, tasks
 from src.logger import setup_logger
+from src.repair_quotas import repair
+from src.uploads import UploadLimitMiddleware
+from starlette.formparsers import MultiPartParser
 
 logger = setup_logger()
 
 os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,6 +26,15 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=settings.gzip_minimum_size,
+    compresslevel=settings.gzip_level,
+)
+app.add_middleware(UploadLimitMiddleware, max_size=settings.max_upload_size)
+
+# Uploaded files are held in memory up to this size, then spooled to disk.
+MultiPartParser.max_file_size = settings.upload_spool_size
 
 
 async def set_body(request: Request, body: bytes):
@@ -33,13 +50,33 @@ async def get_body(request: Request) -> bytes:
     return body
 
 
+# Attachment downloads, and any response without a small known length, are
+# streamed through rather than buffered to be logged.
+STREAMED_ENDPOINTS = {tasks.download_file}
+
+
+def should_log_body(request: Request, response: Response):
+    if request.scope.get("endpoint") in STREAMED_ENDPOINTS:
+        return False
+    content_length = response.headers.get("content-length", "")
+    return (
+        content_length.isdigit() and int(content_length) <= settings.log_body_max_size
+    )
+
+
 @app.middleware("http")
 async def app_entry(request: Request, call_next):
     logger.info(f"Incoming Request: {request.method} {request.url}")
-    await set_body(request, await request.body())
-    logger.info(f"Request Body: {await get_body(request)}")
+    if request.headers.get("content-type", "").startswith("multipart/"):
+        # Uploads are streamed to the handler, so they are not buffered here.
+        logger.info("Request Body: <multipart upload>")
+    else:
+        await set_body(request, await request.body())
+        logger.info(f"Request Body: {await get_body(request)}")
     response = await call_next(request)
     logger.info(f"Outgoing Response: {response.status_code}")
+    if not should_log_body(request, response):
+        return response
     res_body = b""
     async for chunk in response.body_iterator:
         res_body += chunk
@@ -56,6 +93,14 @@ app.include_router(tasks.router)
 app.include_router(reports.router)
 
 
+@app.on_event("startup")
+async def start_background_jobs():
+    periodic.start(repair, settings.quota_repair_interval, logger, "task quota repair")
+    periodic.start(
+        collect, settings.blob_gc_interval, logger, "attachment blob collection"
+    )
+
+
 @app.get("/")
 async def root():
     return {"message": "Testing"}
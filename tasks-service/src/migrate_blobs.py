@@ -0,0 +1,40 @@
+"""Move attachment bytes stored in attachments.file_attachment to the blob store.
+
+    python -m src.migrate_blobs
+
+Attachments are moved one per transaction, so only one attachment's bytes
+are held in memory at a time. Rows locked by another run are skipped, so
+several copies can run side by side, and the tool can be stopped and
+restarted at any point. Downloads keep working for rows that have not been
+moved yet.
+"""
+import asyncio
+
+from src.database import SessionLocal
+from src.logger import setup_logger
+from src.repository import blobs
+from src.storage import blob_store, iterate_bytes
+
+
+async def migrate_all(logger):
+    moved = 0
+    while True:
+        async with SessionLocal() as db:
+            attachment = await blobs.get_legacy_attachment(db)
+            if attachment is None:
+                return moved
+            id, content_type, file_data = attachment
+            staged = await blob_store.stage(iterate_bytes(file_data), content_type)
+            try:
+                await blobs.move_attachment(id, staged, db)
+            finally:
+                await blob_store.discard(staged)
+        moved += 1
+        if moved % 100 == 0:
+            logger.info(f"moved {moved} attachments to the blob store")
+
+
+if __name__ == "__main__":
+    logger = setup_logger(stream=True)
+    moved = asyncio.run(migrate_all(logger))
+    logger.info(f"moved {moved} attachments to the blob store")
@@ -1,14 +1,18 @@
 from sqlalchemy import (
     TIMESTAMP,
+    BigInteger,
     Boolean,
     Column,
+    Computed,
     ForeignKey,
+    Index,
     Integer,
     LargeBinary,
     String,
     text,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, query_expression, relationship
 from src.database import Base
 
 
@@ -31,18 +35,68 @@ class Task(Base):
     completed_at = Column(TIMESTAMP(timezone=True))
     is_completed = Column(Boolean, nullable=False, server_default="FALSE")
     user_id = Column(Integer, nullable=False, index=True)
+    search_vector = deferred(
+        Column(
+            TSVECTOR,
+            Computed(
+                "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+                "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+                persisted=True,
+            ),
+        )
+    )
+    rank = query_expression()
 
     attachments = relationship("Attachment", back_populates="attachment")
 
+    __table_args__ = (
+        Index("ix_tasks_user_id_due_date_id", user_id, due_date, id),
+        Index("ix_tasks_user_id_created_at_id", user_id, created_at, id),
+        Index("ix_tasks_user_id_updated_at_id", user_id, updated_at, id),
+        Index("ix_tasks_user_id_title_id", user_id, title, id),
+        Index("ix_tasks_user_id_completed_at_id", user_id, completed_at, id),
+        Index("ix_tasks_search_vector", search_vector, postgresql_using="gin"),
+    )
+
 
 class Attachment(Base):
     __tablename__ = "attachments"
 
     id = Column(Integer, primary_key=True, index=True)
     file_name = Column(String)
-    file_attachment = Column(LargeBinary)
+    file_attachment = deferred(Column(LargeBinary))
     task_id = Column(
         Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False, index=True
     )
+    blob_sha256 = Column(String(64), ForeignKey("blobs.sha256"), index=True)
+    size = Column(BigInteger)
+    content_type = Column(String)
+    created_at = Column(
+        TIMESTAMP(timezone=True), nullable=False, server_default=text("NOW()")
+    )
 
     attachment = relationship("Task", back_populates="attachments")
+
+
+class Blob(Base):
+    __tablename__ = "blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    encoding = Column(String)
+    stored_size = Column(BigInteger, nullable=False)
+    refcount = Column(Integer, nullable=False, server_default="0")
+    created_at = Column(
+        TIMESTAMP(timezone=True), nullable=False, server_default=text("NOW()")
+    )
+
+    __table_args__ = (
+        Index("ix_blobs_unreferenced", sha256, postgresql_where=refcount == 0),
+    )
+
+
+class TaskQuota(Base):
+    __tablename__ = "task_quotas"
+
+    user_id = Column(Integer, primary_key=True)
+    task_count = Column(Integer, nullable=False, server_default="0")
@@ -0,0 +1,27 @@
+import base64
+import binascii
+from datetime import datetime
+
+import orjson
+from src.exceptions import InvalidCursorError
+
+
+def encode_cursor(sort: str, value, id: int):
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = orjson.dumps({"sort": sort, "value": value, "id": id})
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, column):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = orjson.loads(base64.urlsafe_b64decode(padded))
+        if payload["sort"] != sort or not isinstance(payload["id"], int):
+            raise InvalidCursorError
+        value = payload["value"]
+        if value is not None and column.type.python_type is datetime:
+            value = datetime.fromisoformat(value)
+        return value, payload["id"]
+    except (binascii.Error, orjson.JSONDecodeError, KeyError, TypeError, ValueError):
+        raise InvalidCursorError from None
@@ -0,0 +1,21 @@
+import asyncio
+
+background_tasks = set()
+
+
+async def run_periodically(job, interval: float, logger, name: str):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await job(logger)
+        except Exception:
+            logger.exception(f"{name} failed")
+
+
+def start(job, interval: float, logger, name: str):
+    if interval <= 0:
+        return
+    task = asyncio.create_task(run_periodically(job, interval, logger, name))
+    # The event loop only keeps weak references to tasks.
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
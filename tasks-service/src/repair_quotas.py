@@ -0,0 +1,32 @@
+"""Reconcile the per-user task counters with the rows in the tasks table.
+
+    python -m src.repair_quotas
+"""
+import asyncio
+
+from src.config import settings
+from src.database import SessionLocal
+from src.logger import setup_logger
+from src.repository import quotas
+
+
+async def repair_all(batch_size: int = settings.quota_repair_batch_size):
+    repaired = []
+    after = 0
+    while True:
+        async with SessionLocal() as db:
+            user_ids = await quotas.get_quota_user_ids(db, after, batch_size)
+            if not user_ids:
+                return repaired
+            repaired += await quotas.repair_quotas(user_ids, db)
+        after = user_ids[-1]
+
+
+async def repair(logger):
+    repaired = await repair_all()
+    if repaired:
+        logger.warning(f"repaired task quotas for users: {repaired}")
+
+
+if __name__ == "__main__":
+    asyncio.run(repair(setup_logger(stream=True)))
@@ -0,0 +1,95 @@
+from sqlalchemy import literal_column, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.models.tasks import Attachment, Blob
+from src.storage import StagedBlob, blob_store
+
+
+async def claim_blob(staged: StagedBlob, db: AsyncSession):
+    # Inserting or locking the blob row before the file is moved into place
+    # keeps garbage collection, which skips locked rows, from deleting the
+    # file between the move and the attachment insert. Returns whether the
+    # row is new, in which case the file is ours to remove on failure.
+    # An existing row takes the encoding of the file about to replace it;
+    # each encoding has its own path, so readers that saw the old encoding
+    # still find their file.
+    table = Blob.__table__
+    stored = {"encoding": staged.encoding, "stored_size": staged.stored_size}
+    while True:
+        query = (
+            insert(table)
+            .values(sha256=staged.digest, size=staged.size, **stored)
+            .on_conflict_do_nothing(index_elements=[table.c.sha256])
+            .returning(table.c.sha256)
+        )
+        if (await db.execute(query)).first() is not None:
+            return True
+        query = (
+            table.update()
+            .where(table.c.sha256 == staged.digest)
+            .values(**stored)
+            .returning(table.c.sha256)
+        )
+        if (await db.execute(query)).first() is not None:
+            return False
+
+
+async def store_blob(staged: StagedBlob, db: AsyncSession):
+    inserted = await claim_blob(staged, db)
+    try:
+        await blob_store.commit(staged)
+    except Exception:
+        await db.rollback()
+        raise
+    return inserted
+
+
+async def collect_blobs(limit: int, db: AsyncSession):
+    table = Blob.__table__
+    query = (
+        select(table.c.sha256)
+        .where(table.c.refcount == literal_column("0"))
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    digests = (await db.scalars(query)).all()
+    if not digests:
+        return digests
+    # Files go before the rows are committed: if the commit fails the rows
+    # survive with a missing file, which the next upload of the same content
+    # simply writes again.
+    for digest in digests:
+        await blob_store.delete(digest)
+    await db.execute(table.delete().where(table.c.sha256.in_(digests)))
+    await db.commit()
+    return digests
+
+
+async def get_legacy_attachment(db: AsyncSession):
+    query = (
+        select(Attachment.id, Attachment.content_type, Attachment.file_attachment)
+        .where(Attachment.blob_sha256.is_(None), Attachment.file_attachment.isnot(None))
+        .order_by(Attachment.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    return (await db.execute(query)).first()
+
+
+async def move_attachment(id: int, staged: StagedBlob, db: AsyncSession):
+    # A new blob's file is removed again if the transaction does not commit;
+    # nothing else references it, and the attachment keeps its bytes.
+    inserted = await store_blob(staged, db)
+    try:
+        query = (
+            Attachment.__table__.update()
+            .where(Attachment.id == id)
+            .values(blob_sha256=staged.digest, size=staged.size, file_attachment=None)
+        )
+        await db.execute(query)
+        await db.commit()
+    except Exception:
+        if inserted:
+            await blob_store.delete(staged.digest)
+        await db.rollback()
+        raise
@@ -0,0 +1,85 @@
+from sqlalchemy import and_, func, select, union
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.config import settings
+from src.exceptions import MaxTasksReachedError
+from src.models.tasks import Task, TaskQuota
+
+
+async def reserve_tasks(user_id: int, count: int, db: AsyncSession):
+    # The conditional upsert row-locks the user's counter, so concurrent
+    # creates serialize on it and can never push the count past max_tasks.
+    table = TaskQuota.__table__
+    query = (
+        insert(table)
+        .values(user_id=user_id, task_count=count)
+        .on_conflict_do_update(
+            index_elements=[table.c.user_id],
+            set_={"task_count": table.c.task_count + count},
+            where=table.c.task_count + count <= settings.max_tasks,
+        )
+        .returning(table.c.task_count)
+    )
+    if count > settings.max_tasks or (await db.execute(query)).first() is None:
+        await db.rollback()
+        raise MaxTasksReachedError
+
+
+async def release_tasks(user_id: int, count: int, db: AsyncSession):
+    table = TaskQuota.__table__
+    query = (
+        table.update()
+        .where(table.c.user_id == user_id)
+        .values(task_count=func.greatest(table.c.task_count - count, 0))
+    )
+    await db.execute(query)
+
+
+async def get_quota_user_ids(db: AsyncSession, after: int, limit: int):
+    user_ids = union(
+        *(
+            select(column)
+            .where(column > after)
+            .distinct()
+            .order_by(column)
+            .limit(limit)
+            .subquery()
+            .select()
+            for column in (Task.user_id, TaskQuota.user_id)
+        )
+    ).subquery()
+    query = select(user_ids.c.user_id).order_by(user_ids.c.user_id).limit(limit)
+    return (await db.scalars(query)).all()
+
+
+async def repair_quotas(user_ids: list, db: AsyncSession):
+    # Counters are locked before counting so a concurrent create or delete
+    # either commits first and is counted, or waits and applies on top.
+    # Users without a counter row are only inserted, never overwritten, in
+    # case a create added the row after the lock was taken.
+    table = TaskQuota.__table__
+    query = select(table.c.user_id).where(table.c.user_id.in_(user_ids))
+    locked = (await db.scalars(query.with_for_update())).all()
+    counts = (
+        await db.execute(
+            select(Task.user_id, func.count())
+            .where(Task.user_id.in_(user_ids))
+            .group_by(Task.user_id)
+        )
+    ).all()
+    actual = dict.fromkeys(user_ids, 0)
+    actual.update(counts)
+    query = insert(table).values(
+        [{"user_id": user_id, "task_count": count} for user_id, count in actual.items()]
+    )
+    query = query.on_conflict_do_update(
+        index_elements=[table.c.user_id],
+        set_={"task_count": query.excluded.task_count},
+        where=and_(
+            table.c.task_count != query.excluded.task_count,
+            table.c.user_id.in_(locked),
+        ),
+    ).returning(table.c.user_id)
+    repaired = (await db.scalars(query)).all()
+    await db.commit()
+    return repaired
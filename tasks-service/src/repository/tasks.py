@@ -1,33 +1,47 @@
 from datetime import date
 from typing import Optional
 
-from sqlalchemy import Date, cast, func
+from sqlalchemy import (
+    TIMESTAMP,
+    BigInteger,
+    Boolean,
+    Date,
+    Float,
+    Integer,
+    String,
+    and_,
+    any_,
+    cast,
+    column,
+    func,
+    literal,
+    or_,
+    select,
+    tuple_,
+    values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer, with_expression
 from sqlalchemy.sql.functions import coalesce
-from src.config import settings
-from src.exceptions import (
-    CreateError,
-    DeleteError,
-    GetError,
-    MaxTasksReachedError,
-    UpdateError,
-)
-from src.models.tasks import Attachment, Task
+from src.exceptions import CreateError, DeleteError, GetError, UpdateError
+from src.models.tasks import Attachment, Blob, Task
+from src.repository import blobs, quotas
+from src.storage import StagedBlob, blob_store
 
+SEARCH_CONFIG = "english"
+SORT_COLUMNS = {
+    "due_date": Task.due_date,
+    "created_at": Task.created_at,
+    "updated_at": Task.updated_at,
+    "title": Task.title,
+    "completed_at": Task.completed_at,
+}
 
-def max_tasks_reached(
-    db: Session,
-    id: int,
-):
-    task_check = get_max_tasks(id, db)
-    if task_check:
-        return True
 
-
-def create_task(id, task: Task, db: Session):
-    if max_tasks_reached(db, id):
-        raise MaxTasksReachedError
+async def create_task(id, task: Task, db: AsyncSession):
+    await quotas.reserve_tasks(id, 1, db)
     try:
         query = (
             Task.__table__.insert()
@@ -41,15 +55,45 @@ def create_task(id, task: Task, db: Session):
                 user_id=task.user_id,
             )
         )
-        new_task = db.execute(query).fetchone()
-        db.commit()
+        new_task = (await db.execute(query)).fetchone()
+        await db.commit()
         return new_task
     except SQLAlchemyError as e:
         print(f"Exception: {e}")
+        await db.rollback()
         raise CreateError from e
 
 
-def update_task(task_id: int, task: Task, db: Session, user_id: int):
+async def create_tasks(user_id: int, tasks: list, db: AsyncSession):
+    await quotas.reserve_tasks(user_id, len(tasks), db)
+    try:
+        query = (
+            Task.__table__.insert()
+            .returning("*")
+            .values(
+                [
+                    {
+                        "title": task.title,
+                        "description": task.description,
+                        "due_date": task.due_date,
+                        "is_completed": task.is_completed,
+                        "completed_at": task.completed_at,
+                        "user_id": user_id,
+                    }
+                    for task in tasks
+                ]
+            )
+        )
+        new_tasks = (await db.execute(query)).fetchall()
+        await db.commit()
+        return new_tasks
+    except SQLAlchemyError as e:
+        print(f"Exception: {e}")
+        await db.rollback()
+        raise CreateError from e
+
+
+async def update_task(task_id: int, task: Task, db: AsyncSession, user_id: int):
     query = (
         Task.__table__.update()
         .returning("*")
@@ -62,120 +106,277 @@ def update_task(task_id: int, task: Task, db: Session, user_id: int):
             completed_at=task.completed_at,
         )
     )
-    updated_task = db.execute(query).fetchone()
-    db.commit()
+    updated_task = (await db.execute(query)).fetchone()
+    await db.commit()
     if not updated_task:
         raise UpdateError
     return updated_task
 
 
-def delete_task(task_id: int, db: Session, user_id: int):
+async def update_tasks(user_id: int, tasks: list, db: AsyncSession):
+    # A VALUES column that is NULL in every row is typed as text by
+    # Postgres, so nullable columns are cast back before they are assigned.
+    table = Task.__table__
+    timestamp = TIMESTAMP(timezone=True)
+    changes = values(
+        column("id", Integer),
+        column("title", String),
+        column("description", String),
+        column("due_date", timestamp),
+        column("is_completed", Boolean),
+        column("completed_at", timestamp),
+        name="changes",
+    ).data(
+        [
+            (
+                task.id,
+                task.title,
+                task.description,
+                task.due_date,
+                task.is_completed,
+                task.completed_at,
+            )
+            for task in tasks
+        ]
+    )
+    query = (
+        table.update()
+        .returning(table)
+        .where(table.c.id == changes.c.id, table.c.user_id == user_id)
+        .values(
+            title=coalesce(changes.c.title, table.c.title),
+            description=coalesce(changes.c.description, table.c.description),
+            due_date=coalesce(cast(changes.c.due_date, timestamp), table.c.due_date),
+            is_completed=coalesce(
+                cast(changes.c.is_completed, Boolean), table.c.is_completed
+            ),
+            completed_at=cast(changes.c.completed_at, timestamp),
+        )
+    )
+    updated_tasks = (await db.execute(query)).fetchall()
+    await db.commit()
+    return updated_tasks
+
+
+async def delete_task(task_id: int, db: AsyncSession, user_id: int):
     query = (
         Task.__table__.delete()
         .returning("*")
         .where(Task.__table__.c.id == task_id, Task.__table__.c.user_id == user_id)
     )
-    deleted_task = db.execute(query).fetchone()
-    db.commit()
+    deleted_task = (await db.execute(query)).fetchone()
     if not deleted_task:
         raise DeleteError
+    await quotas.release_tasks(user_id, 1, db)
+    await db.commit()
     return deleted_task
 
 
-def get_task(task_id: int, db: Session, user_id):
-    task = db.query(Task).filter(Task.id == task_id, Task.user_id == user_id).first()
+async def delete_tasks(user_id: int, ids: list, db: AsyncSession):
+    table = Task.__table__
+    query = (
+        table.delete()
+        .returning(table.c.id)
+        .where(
+            table.c.user_id == user_id,
+            table.c.id == any_(literal(ids, ARRAY(Integer))),
+        )
+    )
+    deleted_ids = (await db.execute(query)).scalars().all()
+    if deleted_ids:
+        await quotas.release_tasks(user_id, len(deleted_ids), db)
+    await db.commit()
+    return deleted_ids
+
+
+async def get_task(task_id: int, db: AsyncSession, user_id):
+    query = select(Task).where(Task.id == task_id, Task.user_id == user_id)
+    task = (await db.scalars(query)).first()
     if not task:
         raise GetError
     return task
 
 
-def get_tasks(
+def search_query(search: str):
+    return func.websearch_to_tsquery(SEARCH_CONFIG, search)
+
+
+def sort_column(sort: str, search: Optional[str] = ""):
+    key = sort.removeprefix("-")
+    descending = sort.startswith("-") or key == "rank"
+    if key == "rank":
+        rank = func.ts_rank_cd(Task.search_vector, search_query(search), type_=Float)
+        return rank, descending
+    return SORT_COLUMNS[key], descending
+
+
+async def get_tasks(
     user_id: int,
-    db: Session,
+    db: AsyncSession,
     search: Optional[str] = "",
     sort: Optional[str] = "due_date",
+    limit: Optional[int] = None,
+    after: Optional[tuple] = None,
+    search_mode: Optional[str] = "contains",
 ):
-    sort_attr = getattr(Task, sort)
-    tasks = (
-        db.query(Task)
-        .filter(
-            Task.user_id == user_id,
-            Task.title.contains(search),
-        )
-        .order_by(sort_attr)
-        .all()
-    )
+    sort_attr, descending = sort_column(sort, search)
+    order = (sort_attr.desc(), Task.id.desc()) if descending else (sort_attr, Task.id)
+    query = select(Task).where(Task.user_id == user_id).order_by(*order).limit(limit)
+    if search_mode == "fulltext":
+        rank, _ = sort_column("rank", search)
+        query = query.where(Task.search_vector.op("@@")(search_query(search)))
+        query = query.options(with_expression(Task.rank, rank))
+    else:
+        query = query.where(Task.title.contains(search))
+    if after is not None:
+        query = query.where(keyset_after(sort_attr, *after, descending=descending))
+    tasks = (await db.scalars(query)).all()
     if not tasks:
         raise GetError
     return tasks
 
 
-def get_max_tasks(id: int, db: Session):
-    max_tasks = (
-        db.query(Task.user_id)
-        .filter(Task.user_id == id)
-        .group_by(Task.user_id)
-        .having(func.count(Task.user_id) == settings.max_tasks)
-        .first()
+def keyset_after(sort_attr, value, id: int, descending: bool = False):
+    # Postgres puts NULLs last in ascending order and first in descending
+    # order, which is also the order a (user_id, key, id) index scan returns.
+    if value is None:
+        if descending:
+            return or_(and_(sort_attr.is_(None), Task.id < id), sort_attr.is_not(None))
+        return and_(sort_attr.is_(None), Task.id > id)
+    row = tuple_(sort_attr, Task.id)
+    bound = tuple_(literal(value, sort_attr.type), id)
+    if descending:
+        return row < bound
+    if not getattr(sort_attr, "nullable", False):
+        return row > bound
+    return or_(row > bound, sort_attr.is_(None))
+
+
+async def get_tasks_version(user_id: int, db: AsyncSession):
+    query = select(func.count(Task.id), func.max(Task.updated_at)).where(
+        Task.user_id == user_id
     )
-    return max_tasks
+    version = (await db.execute(query)).one()
+    return version
 
 
-def get_similar_tasks(user_id: int, db: Session):
-    similar_tasks = (
-        db.query(Task.title, Task.description, func.count("*").label("count"))
-        .filter(Task.user_id == user_id)
+async def get_similar_tasks(user_id: int, db: AsyncSession):
+    query = (
+        select(Task.title, Task.description, func.count().label("count"))
+        .where(Task.user_id == user_id)
         .group_by(Task.title, Task.description)
-        .having(func.count("*") > 1)
-    ).all()
+        .having(func.count() > 1)
+    )
+    similar_tasks = (await db.execute(query)).all()
     if not similar_tasks:
         raise GetError
     return similar_tasks
 
 
-def all_tasks_due_today(db: Session):
-    all_tasks_due_today = (
-        db.query(Task).filter(cast(Task.due_date, Date) == date.today()).all()
-    )
+async def all_tasks_due_today(db: AsyncSession):
+    query = select(Task).where(cast(Task.due_date, Date) == date.today())
+    all_tasks_due_today = (await db.scalars(query)).all()
     return all_tasks_due_today
 
 
-def tasks_due_today(db: Session, user_id: int):
-    user_tasks_due_today = (
-        db.query(Task)
-        .filter(
-            cast(Task.due_date, Date) == date.today(),
-            Task.user_id == user_id,
-        )
-        .all()
+async def tasks_due_today(db: AsyncSession, user_id: int):
+    query = select(Task).where(
+        cast(Task.due_date, Date) == date.today(),
+        Task.user_id == user_id,
     )
+    user_tasks_due_today = (await db.scalars(query)).all()
     return user_tasks_due_today
 
 
-def create_file(task_id: int, file_name: str, file_data: bytes, db: Session):
-    attachment = Attachment(
-        task_id=task_id, file_attachment=file_data, file_name=file_name
-    )
-    query = (
-        Attachment.__table__.insert()
-        .returning("*")
-        .values(
-            task_id=attachment.task_id,
-            file_attachment=attachment.file_attachment,
-            file_name=attachment.file_name,
+async def create_file(
+    task_id: int,
+    file_name: str,
+    content_type: str,
+    staged: StagedBlob,
+    db: AsyncSession,
+):
+    inserted = await blobs.store_blob(staged, db)
+    try:
+        query = (
+            Attachment.__table__.insert()
+            .returning("*")
+            .values(
+                task_id=task_id,
+                file_name=file_name,
+                content_type=content_type,
+                blob_sha256=staged.digest,
+                size=staged.size,
+            )
         )
-    )
-    new_file = db.execute(query).fetchone()
-    db.commit()
+        new_file = (await db.execute(query)).fetchone()
+    except SQLAlchemyError as e:
+        print(f"Exception: {e}")
+        if inserted:
+            await blob_store.delete(staged.digest)
+        await db.rollback()
+        raise CreateError from e
+    await db.commit()
     return new_file
 
 
-def get_file(file_id: int, task_id: int, db: Session):
-    file = (
-        db.query(Attachment)
-        .filter(Attachment.id == file_id, Attachment.task_id == task_id)
-        .first()
+async def get_file(file_id: int, task_id: int, db: AsyncSession):
+    # file_attachment is deferred; it is only set for rows that
+    # src.migrate_blobs has not moved to the blob store yet.
+    query = (
+        select(Attachment, Blob)
+        .outerjoin(Blob, Blob.sha256 == Attachment.blob_sha256)
+        .options(undefer(Attachment.file_attachment))
+        .where(Attachment.id == file_id, Attachment.task_id == task_id)
     )
+    file = (await db.execute(query)).first()
     if not file:
         raise FileNotFoundError
     return file
+
+
+# Rows not yet moved to the blob store have no size recorded; the length
+# is taken in the database so the bytes never leave it.
+attachment_size = coalesce(
+    Attachment.size, func.octet_length(Attachment.file_attachment)
+)
+
+
+async def get_files(task_id: int, db: AsyncSession):
+    query = (
+        select(
+            Attachment.id,
+            Attachment.file_name,
+            Attachment.content_type,
+            attachment_size.label("size"),
+            Attachment.blob_sha256.label("sha256"),
+            Attachment.created_at,
+        )
+        .where(Attachment.task_id == task_id)
+        .order_by(Attachment.id)
+    )
+    return (await db.execute(query)).all()
+
+
+async def get_attachment_summaries(task_ids: list, db: AsyncSession):
+    query = (
+        select(
+            Attachment.task_id,
+            func.count(),
+            cast(coalesce(func.sum(attachment_size), 0), BigInteger),
+        )
+        .where(Attachment.task_id.in_(task_ids))
+        .group_by(Attachment.task_id)
+    )
+    rows = (await db.execute(query)).all()
+    return {task_id: {"count": count, "size": size} for task_id, count, size in rows}
+
+
+async def get_attachments_version(user_id: int, db: AsyncSession):
+    # Attachments are only ever added, or removed along with their task,
+    # so their count and highest id change whenever a summary would.
+    query = (
+        select(func.count(Attachment.id), func.max(Attachment.id))
+        .join(Task, Task.id == Attachment.task_id)
+        .where(Task.user_id == user_id)
+    )
+    return (await db.execute(query)).one()
@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+
+
+def serialize_row(row, model: type[BaseModel]):
+    if row is None:
+        return None
+    return {name: getattr(row, name) for name in model.__fields__}
+
+
+def serialize_rows(rows, model: type[BaseModel]):
+    return [serialize_row(row, model) for row in rows]
@@ -0,0 +1,221 @@
+import hashlib
+import os
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+import zstandard
+from src.config import settings
+from starlette.concurrency import run_in_threadpool
+
+# Formats that are already compressed; compressing them again costs CPU on
+# every upload and download for no saving.
+INCOMPRESSIBLE_TYPES = (
+    "image/",
+    "video/",
+    "audio/",
+    "font/woff",
+    "application/zip",
+    "application/gzip",
+    "application/zstd",
+    "application/x-7z-compressed",
+    "application/x-rar-compressed",
+    "application/x-bzip2",
+    "application/x-xz",
+)
+SUFFIXES = {None: "", "zstd": ".zst"}
+
+
+@dataclass
+class StagedBlob:
+    digest: str
+    size: int
+    location: str
+    encoding: Optional[str] = None
+    stored_size: Optional[int] = None
+
+
+def should_compress(content_type: Optional[str], sample: bytes):
+    if (
+        not settings.blob_compression
+        or len(sample) < settings.blob_compression_min_size
+    ):
+        return False
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type.startswith(INCOMPRESSIBLE_TYPES) and not media_type.endswith("+xml"):
+        return False
+    compressed = zstandard.ZstdCompressor(
+        level=settings.blob_compression_level
+    ).compress(sample)
+    return len(compressed) <= len(sample) * settings.blob_compression_max_ratio
+
+
+# The first blob_compression_sample_size bytes are held back to decide whether
+# to compress. The digest is taken over the uncompressed bytes, so the same
+# file deduplicates whether or not it was compressed.
+class Encoder:
+    def __init__(self, content_type: Optional[str]):
+        self.content_type = content_type
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self.pending = bytearray()
+        self.compressor = None
+        self.decided = False
+
+    @property
+    def encoding(self):
+        return "zstd" if self.compressor is not None else None
+
+    def decide(self):
+        self.decided = True
+        if should_compress(self.content_type, bytes(self.pending)):
+            level = settings.blob_compression_level
+            self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        data, self.pending = bytes(self.pending), bytearray()
+        return self.encode(data)
+
+    def encode(self, data: bytes):
+        if self.compressor is None:
+            return data
+        return self.compressor.compress(data)
+
+    def feed(self, chunk: bytes):
+        self.sha256.update(chunk)
+        self.size += len(chunk)
+        if self.decided:
+            return self.encode(chunk)
+        self.pending += chunk
+        if len(self.pending) < settings.blob_compression_sample_size:
+            return b""
+        return self.decide()
+
+    def finish(self):
+        data = b"" if self.decided else self.decide()
+        if self.compressor is not None:
+            data += self.compressor.flush()
+        return data
+
+
+# Uploads are staged while their digest is computed and only become
+# addressable once commit() moves them into place, so identical uploads
+# commit to the same blob.
+class BlobStore(ABC):
+    @abstractmethod
+    async def stage(
+        self, chunks: AsyncIterator[bytes], content_type: Optional[str] = None
+    ) -> StagedBlob:
+        pass
+
+    @abstractmethod
+    async def commit(self, staged: StagedBlob):
+        pass
+
+    @abstractmethod
+    async def discard(self, staged: StagedBlob):
+        pass
+
+    @abstractmethod
+    async def open(self, digest: str, encoding: Optional[str] = None):
+        pass
+
+    @abstractmethod
+    async def delete(self, digest: str):
+        pass
+
+    async def iterate(
+        self,
+        digest: str,
+        start: int = 0,
+        end: Optional[int] = None,
+        encoding: Optional[str] = None,
+        decode: bool = True,
+        chunk_size: int = settings.blob_chunk_size,
+    ):
+        # Seeking into a compressed blob decompresses and drops everything
+        # before start.
+        f = await self.open(digest, encoding)
+        if encoding is not None and decode:
+            f = zstandard.ZstdDecompressor().stream_reader(f)
+        try:
+            await run_in_threadpool(f.seek, start)
+            remaining = float("inf") if end is None else end - start
+            while remaining > 0:
+                chunk = await run_in_threadpool(f.read, min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            await run_in_threadpool(f.close)
+
+
+class LocalBlobStore(BlobStore):
+    def __init__(self, root: str):
+        self.root = root
+        self.staging = os.path.join(root, "staging")
+        os.makedirs(self.staging, exist_ok=True)
+
+    def path(self, digest: str, encoding: Optional[str] = None):
+        name = digest + SUFFIXES[encoding]
+        return os.path.join(self.root, digest[:2], digest[2:4], name)
+
+    async def stage(
+        self, chunks: AsyncIterator[bytes], content_type: Optional[str] = None
+    ) -> StagedBlob:
+        location = os.path.join(self.staging, uuid.uuid4().hex)
+        encoder = Encoder(content_type)
+        stored_size = 0
+        f = await run_in_threadpool(open, location, "wb")
+        try:
+            async for chunk in chunks:
+                data = encoder.feed(chunk)
+                stored_size += len(data)
+                await run_in_threadpool(f.write, data)
+            data = encoder.finish()
+            stored_size += len(data)
+            await run_in_threadpool(f.write, data)
+        except BaseException:
+            await run_in_threadpool(f.close)
+            await run_in_threadpool(remove, location)
+            raise
+        await run_in_threadpool(f.close)
+        return StagedBlob(
+            encoder.sha256.hexdigest(),
+            encoder.size,
+            location,
+            encoder.encoding,
+            stored_size,
+        )
+
+    async def commit(self, staged: StagedBlob):
+        path = self.path(staged.digest, staged.encoding)
+        await run_in_threadpool(os.makedirs, os.path.dirname(path), exist_ok=True)
+        await run_in_threadpool(os.replace, staged.location, path)
+
+    async def discard(self, staged: StagedBlob):
+        await run_in_threadpool(remove, staged.location)
+
+    async def open(self, digest: str, encoding: Optional[str] = None):
+        return await run_in_threadpool(open, self.path(digest, encoding), "rb")
+
+    async def delete(self, digest: str):
+        for encoding in SUFFIXES:
+            await run_in_threadpool(remove, self.path(digest, encoding))
+
+
+def remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def iterate_bytes(data: bytes, chunk_size: int = settings.blob_chunk_size):
+    for start in range(0, len(data), chunk_size):
+        yield data[start : start + chunk_size]
+
+
+BACKENDS = {"local": lambda: LocalBlobStore(settings.blob_store_path)}
+
+blob_store = BACKENDS[settings.blob_store_backend]()
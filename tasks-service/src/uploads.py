@@ -0,0 +1,58 @@
+from fastapi import HTTPException, status
+from fastapi.responses import ORJSONResponse
+from starlette.datastructures import Headers
+
+
+def too_large(max_size: int):
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"upload exceeds the maximum size of {max_size} bytes",
+    )
+
+
+class UploadLimitMiddleware:
+    def __init__(self, app, max_size: int):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        headers = Headers(scope=scope) if scope["type"] == "http" else {}
+        if not headers.get("content-type", "").startswith("multipart/"):
+            await self.app(scope, receive, send)
+            return
+        content_length = headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > self.max_size:
+            await self.reject(scope, receive, send)
+            return
+        # Counting the bytes as they arrive cuts an oversized upload off as
+        # soon as it passes the limit, before it has been spooled in full.
+        state = {"received": 0, "started": False}
+
+        async def limited_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                state["received"] += len(message.get("body", b""))
+                if state["received"] > self.max_size:
+                    raise too_large(self.max_size)
+            return message
+
+        async def tracked_send(message):
+            if message["type"] == "http.response.start":
+                state["started"] = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except HTTPException as e:
+            if state["started"] or e.status_code != 413:
+                raise
+            await self.reject(scope, receive, send)
+
+    async def reject(self, scope, receive, send):
+        error = too_large(self.max_size)
+        response = ORJSONResponse(
+            {"detail": error.detail},
+            status_code=error.status_code,
+            headers={"Connection": "close"},
+        )
+        await response(scope, receive, send)
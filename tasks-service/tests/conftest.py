@@ -0,0 +1,88 @@
+import os
+import tempfile
+
+for key, value in {
+    "url": "http://localhost:8000",
+    "users_service_url": "http://users:8000",
+    "db_username": "test",
+    "db_password": "test",
+    "db_hostname": "localhost",
+    "db_port": "5432",
+    "db_name": "tasks",
+    "mail_username": "test",
+    "mail_password": "test",
+    "mail_from": "test@example.com",
+    "mail_port": "587",
+    "mail_server": "localhost",
+    "mail_tls": "False",
+    "mail_ssl": "False",
+    "use_credentials": "False",
+    "max_tasks": "50",
+    "cache_expiry_time": "60",
+    "blob_store_path": tempfile.mkdtemp(prefix="tasks-blobs-"),
+}.items():
+    os.environ.setdefault(key, value)
+
+import pytest  # noqa: E402
+from sqlalchemy.dialects import postgresql  # noqa: E402
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def first(self):
+        return self.fetchone()
+
+    def one(self):
+        return self.rows[0]
+
+    def fetchall(self):
+        return self.rows
+
+    def all(self):
+        return self.rows
+
+    def scalars(self):
+        return self
+
+
+class FakeSession:
+    def __init__(self, *results):
+        self.results = list(results)
+        self.statements = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        result = self.results.pop(0) if self.results else []
+        if isinstance(result, Exception):
+            raise result
+        return FakeResult(result)
+
+    scalars = execute
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+def compile_sql(statement):
+    return statement.compile(dialect=postgresql.asyncpg.dialect())
+
+
+@pytest.fixture
+def db():
+    return FakeSession()
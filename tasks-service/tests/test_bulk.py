@@ -0,0 +1,58 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from src.dtos import dto_tasks
+from src.exceptions import MaxTasksReachedError
+from src.models.tasks import Task
+from src.repository import tasks as repository
+from tests.conftest import FakeSession, compile_sql
+
+
+def test_update_tasks_uses_one_values_statement():
+    db = FakeSession([])
+    changes = [
+        Task(id=1, title="one"),
+        Task(id=2, due_date=datetime(2023, 6, 1, tzinfo=timezone.utc)),
+    ]
+    asyncio.run(repository.update_tasks(7, changes, db))
+    (statement,) = db.statements
+    compiled = compile_sql(statement)
+    sql = str(compiled)
+    assert sql.startswith("UPDATE tasks SET")
+    assert "FROM (VALUES" in sql
+    assert "CAST(changes.due_date AS TIMESTAMP WITH TIME ZONE)" in sql
+    assert "tasks.id = changes.id AND tasks.user_id = " in sql
+    assert db.commits == 1
+
+
+def test_delete_tasks_binds_ids_as_one_array():
+    db = FakeSession([1, 3], [])
+    deleted = asyncio.run(repository.delete_tasks(7, [1, 2, 3], db))
+    assert deleted == [1, 3]
+    delete, release = db.statements
+    compiled = compile_sql(delete)
+    assert "tasks.id = ANY (" in str(compiled)
+    assert [1, 2, 3] in compiled.params.values()
+    assert str(compile_sql(release)).startswith("UPDATE task_quotas")
+    assert db.commits == 1
+
+
+def test_delete_tasks_none_deleted_keeps_quota():
+    db = FakeSession([])
+    assert asyncio.run(repository.delete_tasks(7, [1], db)) == []
+    assert len(db.statements) == 1
+
+
+def test_create_tasks_over_quota():
+    db = FakeSession([])
+    tasks = [Task(title=f"task {i}") for i in range(2)]
+    with pytest.raises(MaxTasksReachedError):
+        asyncio.run(repository.create_tasks(7, tasks, db))
+    assert len(db.statements) == 1
+    assert db.rollbacks == 1
+
+
+def test_bulk_ids_must_be_unique():
+    with pytest.raises(ValueError):
+        dto_tasks.BulkDeleteRequest(ids=[1, 1])
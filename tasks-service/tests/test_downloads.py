@@ -0,0 +1,100 @@
+import asyncio
+import hashlib
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from src.downloads import accepts_encoding, content_disposition, parse_range
+from src.handler import tasks as handler
+from tests.conftest import FakeSession
+
+DATA = bytes(range(256)) * 4
+ETAG = f'"{hashlib.sha256(DATA).hexdigest()}"'
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("bytes=0-99", (0, 100)),
+        ("bytes=100-", (100, 1000)),
+        ("bytes=-100", (900, 1000)),
+        ("bytes=-5000", (0, 1000)),
+        ("bytes=900-5000", (900, 1000)),
+        ("bytes=0-0,5-9", None),
+        ("items=0-9", None),
+        ("bytes=9-5", None),
+        ("bytes=a-b", None),
+        ("bytes=-", None),
+    ],
+)
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize(
+    "header, size",
+    [("bytes=1000-", 1000), ("bytes=-0", 1000), ("bytes=-5", 0), ("bytes=0-", 0)],
+)
+def test_parse_range_not_satisfiable(header, size):
+    with pytest.raises(HTTPException) as error:
+        parse_range(header, size)
+    assert error.value.status_code == 416
+    assert error.value.headers == {"Content-Range": f"bytes */{size}"}
+
+
+def test_accepts_encoding():
+    assert accepts_encoding("gzip, zstd", "zstd")
+    assert accepts_encoding("*", "zstd")
+    assert not accepts_encoding("zstd;q=0, *", "zstd")
+    assert not accepts_encoding(None, "zstd")
+
+
+def test_content_disposition_quotes_non_ascii_names():
+    assert content_disposition("a.txt") == 'attachment; filename="a.txt"'
+    assert content_disposition("ä b.txt") == (
+        "attachment; filename*=utf-8''%C3%A4%20b.txt"
+    )
+
+
+def download(**headers):
+    task = SimpleNamespace(id=1)
+    file = SimpleNamespace(file_name="a.bin", content_type=None, file_attachment=DATA)
+    db = FakeSession([task], [(file, None)])
+    user = SimpleNamespace(id=1)
+
+    async def scenario():
+        response = await handler.download_file(1, 1, db, user, **headers)
+        body = b""
+        if hasattr(response, "body_iterator"):
+            body = b"".join([chunk async for chunk in response.body_iterator])
+        return response, body
+
+    return asyncio.run(scenario())
+
+
+def test_download_range():
+    response, body = download(range_header="bytes=10-19")
+    assert response.status_code == 206
+    assert response.headers["content-range"] == "bytes 10-19/1024"
+    assert response.headers["etag"] == ETAG
+    assert body == DATA[10:20]
+
+
+def test_download_if_range_matches():
+    response, body = download(range_header="bytes=10-19", if_range=ETAG)
+    assert response.status_code == 206
+    assert body == DATA[10:20]
+
+
+def test_download_if_range_stale_sends_whole_file():
+    response, body = download(range_header="bytes=10-19", if_range='"other"')
+    assert response.status_code == 200
+    assert response.headers["content-length"] == str(len(DATA))
+    assert body == DATA
+
+
+def test_download_not_modified():
+    response, body = download(if_none_match=ETAG)
+    assert response.status_code == 304
+    assert response.headers["etag"] == ETAG
+    assert body == b""
@@ -0,0 +1,95 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+import zstandard
+from src.config import settings
+from src.storage import Encoder, LocalBlobStore, iterate_bytes
+
+TEXT = b"".join(b"line %d of a very repetitive log file\n" % i for i in range(5000))
+
+
+@pytest.fixture
+def compression(monkeypatch):
+    monkeypatch.setattr(settings, "blob_compression", True)
+    monkeypatch.setattr(settings, "blob_compression_sample_size", 4096)
+
+
+def encode(data, content_type="text/plain", chunk_size=1000):
+    encoder = Encoder(content_type)
+    output = b"".join(
+        encoder.feed(data[start : start + chunk_size])
+        for start in range(0, len(data), chunk_size)
+    )
+    return encoder, output + encoder.finish()
+
+
+def test_compression_disabled_passes_bytes_through():
+    encoder, output = encode(TEXT)
+    assert encoder.encoding is None
+    assert output == TEXT
+
+
+def test_compressible_upload_is_compressed(compression):
+    encoder, output = encode(TEXT)
+    assert encoder.encoding == "zstd"
+    assert len(output) < len(TEXT) / 10
+    decompressed = zstandard.ZstdDecompressor().stream_reader(output).read()
+    assert decompressed == TEXT
+    assert encoder.sha256.hexdigest() == hashlib.sha256(TEXT).hexdigest()
+    assert encoder.size == len(TEXT)
+
+
+def test_sample_held_back_until_decided(compression):
+    encoder = Encoder("text/plain")
+    assert encoder.feed(TEXT[:1000]) == b""
+    assert not encoder.decided
+    encoder.feed(TEXT[1000:5000])
+    assert encoder.decided
+
+
+@pytest.mark.parametrize(
+    "data, content_type",
+    [
+        (TEXT, "image/png"),
+        (TEXT[:500], "text/plain"),
+        (os.urandom(20000), "application/octet-stream"),
+    ],
+)
+def test_not_worth_compressing(compression, data, content_type):
+    encoder, output = encode(data, content_type)
+    assert encoder.encoding is None
+    assert output == data
+
+
+def test_svg_is_compressed_despite_image_type(compression):
+    encoder, _ = encode(TEXT, "image/svg+xml")
+    assert encoder.encoding == "zstd"
+
+
+def test_compressed_blob_round_trip(compression, tmp_path):
+    store = LocalBlobStore(str(tmp_path))
+
+    async def scenario():
+        staged = await store.stage(iterate_bytes(TEXT, 1000), "text/plain")
+        await store.commit(staged)
+        digest, encoding = staged.digest, staged.encoding
+
+        async def read(**kwargs):
+            chunks = store.iterate(digest, encoding=encoding, **kwargs)
+            return b"".join([chunk async for chunk in chunks])
+
+        return (
+            staged,
+            await read(),
+            await read(start=5000, end=6000),
+            await read(decode=False),
+        )
+
+    staged, whole, part, stored = asyncio.run(scenario())
+    assert staged.encoding == "zstd"
+    assert staged.stored_size == len(stored) < staged.size
+    assert whole == TEXT
+    assert part == TEXT[5000:6000]
+    assert os.path.exists(store.path(staged.digest, "zstd"))
@@ -0,0 +1,27 @@
+import asyncio
+from types import SimpleNamespace
+
+from src.handler import tasks as handler
+from tests.conftest import FakeSession
+
+
+def tasks_etag(**params):
+    db = FakeSession([(3, None)])
+    user = SimpleNamespace(id=1)
+    return asyncio.run(handler.get_tasks_etag(db, user, search="report", **params))
+
+
+def test_etag_depends_on_search_mode():
+    contains = tasks_etag(search_mode="contains")
+    fulltext = tasks_etag(search_mode="fulltext")
+    assert contains != fulltext
+    assert contains == tasks_etag(search_mode="contains")
+
+
+def test_etag_matches():
+    etag = handler.make_etag(1, 2)
+    assert handler.etag_matches(etag, etag)
+    assert handler.etag_matches(f'W/"other", {etag.removeprefix("W/")}', etag)
+    assert handler.etag_matches("*", etag)
+    assert not handler.etag_matches(None, etag)
+    assert not handler.etag_matches('"other"', etag)
@@ -0,0 +1,52 @@
+import pytest
+from fastapi.testclient import TestClient
+from src.config import settings
+from src.database import get_db
+from src.handler import tasks as handler
+from src.main import app
+from src.storage import iterate_bytes
+from starlette.responses import StreamingResponse
+
+USER = {"email": "test@example.com", "uid": "1"}
+
+
+@pytest.fixture
+def client():
+    async def no_db():
+        yield None
+
+    app.dependency_overrides[get_db] = no_db
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_small_json_body_logged(client, caplog):
+    caplog.set_level("INFO", logger="src.main")
+    response = client.get("/")
+    assert response.json() == {"message": "Testing"}
+    assert "Response Body: " in caplog.text
+
+
+def test_json_attachment_download_not_buffered(client, caplog, monkeypatch):
+    caplog.set_level("INFO", logger="src.main")
+
+    async def download_file(*args):
+        data = b'{"secret": true}'
+        return StreamingResponse(
+            iterate_bytes(data),
+            media_type="application/json",
+            headers={"Content-Length": str(len(data))},
+        )
+
+    monkeypatch.setattr(handler, "download_file", download_file)
+    response = client.get("/tasks/1/file/1", headers=USER)
+    assert response.content == b'{"secret": true}'
+    assert "secret" not in caplog.text
+
+
+def test_large_body_not_buffered(client, caplog, monkeypatch):
+    caplog.set_level("INFO", logger="src.main")
+    monkeypatch.setattr(settings, "log_body_max_size", 10)
+    response = client.get("/")
+    assert response.json() == {"message": "Testing"}
+    assert "Response Body" not in caplog.text
@@ -0,0 +1,66 @@
+import asyncio
+import hashlib
+import logging
+import os
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from src import migrate_blobs
+from src.repository import blobs
+from src.storage import LocalBlobStore
+from tests.conftest import FakeSession
+
+logger = logging.getLogger(__name__)
+
+
+class FailingCommitSession(FakeSession):
+    async def commit(self):
+        raise OperationalError("COMMIT", {}, Exception("connection lost"))
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = LocalBlobStore(str(tmp_path))
+    monkeypatch.setattr(migrate_blobs, "blob_store", store)
+    monkeypatch.setattr(blobs, "blob_store", store)
+    return store
+
+
+def use_sessions(monkeypatch, *sessions):
+    sessions = list(sessions)
+    monkeypatch.setattr(migrate_blobs, "SessionLocal", lambda: sessions.pop(0))
+
+
+def legacy_row(id, data):
+    return [(id, "text/plain", data)]
+
+
+def test_moves_one_attachment_per_transaction(store, monkeypatch):
+    first = FakeSession(legacy_row(1, b"first"), [("new",)], [])
+    second = FakeSession(legacy_row(2, b"second"), [("new",)], [])
+    use_sessions(monkeypatch, first, second, FakeSession([]))
+    assert asyncio.run(migrate_blobs.migrate_all(logger)) == 2
+    assert first.commits == second.commits == 1
+    for data in (b"first", b"second"):
+        assert os.path.exists(store.path(hashlib.sha256(data).hexdigest()))
+    assert os.listdir(store.staging) == []
+
+
+def test_failed_commit_removes_new_blob(store, monkeypatch):
+    session = FailingCommitSession(legacy_row(1, b"first"), [("new",)], [])
+    use_sessions(monkeypatch, session)
+    with pytest.raises(OperationalError):
+        asyncio.run(migrate_blobs.migrate_all(logger))
+    assert not os.path.exists(store.path(hashlib.sha256(b"first").hexdigest()))
+    assert os.listdir(store.staging) == []
+    assert session.rollbacks == 1
+
+
+def test_failed_commit_keeps_shared_blob(store, monkeypatch):
+    # The insert conflicts and the update finds the row: another attachment
+    # already references this content, so its file must stay.
+    session = FailingCommitSession(legacy_row(1, b"first"), [], [("old",)], [])
+    use_sessions(monkeypatch, session)
+    with pytest.raises(OperationalError):
+        asyncio.run(migrate_blobs.migrate_all(logger))
+    assert os.path.exists(store.path(hashlib.sha256(b"first").hexdigest()))
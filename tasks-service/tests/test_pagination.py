@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+
+import pytest
+from src.exceptions import InvalidCursorError
+from src.models.tasks import Task
+from src.pagination import decode_cursor, encode_cursor
+from src.repository.tasks import keyset_after
+from tests.conftest import compile_sql
+
+
+@pytest.mark.parametrize(
+    "sort, column, value",
+    [
+        ("due_date", Task.due_date, datetime(2023, 6, 1, 12, tzinfo=timezone.utc)),
+        ("-title", Task.title, "task 7"),
+        ("completed_at", Task.completed_at, None),
+    ],
+)
+def test_cursor_round_trip(sort, column, value):
+    cursor = encode_cursor(sort, value, 7)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, sort, column) == (value, 7)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not a cursor",
+        encode_cursor("title", "task 7", 7)[:-3],
+        encode_cursor("title", "task 7", "7"),
+        encode_cursor("due_date", "task 7", 7),
+    ],
+)
+def test_cursor_rejected(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, "due_date", Task.due_date)
+
+
+def test_cursor_bound_to_sort():
+    cursor = encode_cursor("title", "task 7", 7)
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, "-title", Task.title)
+
+
+def test_keyset_ascending_includes_null_keys():
+    sql = str(compile_sql(keyset_after(Task.due_date, datetime(2023, 6, 1), 7)))
+    assert "(tasks.due_date, tasks.id) > (" in sql
+    assert "tasks.due_date IS NULL" in sql
+
+
+def test_keyset_descending_skips_null_keys():
+    sql = str(
+        compile_sql(
+            keyset_after(Task.due_date, datetime(2023, 6, 1), 7, descending=True)
+        )
+    )
+    assert "(tasks.due_date, tasks.id) < (" in sql
+    assert "IS NULL" not in sql
+
+
+def test_keyset_after_null_key():
+    ascending = str(compile_sql(keyset_after(Task.due_date, None, 7)))
+    descending = str(compile_sql(keyset_after(Task.due_date, None, 7, True)))
+    assert "tasks.due_date IS NULL AND tasks.id >" in ascending
+    assert "tasks.id <" in descending
+    assert "tasks.due_date IS NOT NULL" in descending
@@ -0,0 +1,34 @@
+import asyncio
+import logging
+
+from src import periodic
+
+logger = logging.getLogger(__name__)
+
+
+def test_job_keeps_running_after_failure(caplog):
+    calls = []
+
+    async def job(job_logger):
+        calls.append(job_logger)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+
+    async def scenario():
+        periodic.start(job, 0.01, logger, "test job")
+        (task,) = periodic.background_tasks
+        await asyncio.sleep(0.1)
+        task.cancel()
+
+    asyncio.run(scenario())
+    assert len(calls) > 1
+    assert calls[0] is logger
+    assert "test job failed" in caplog.text
+
+
+def test_disabled_job_is_not_started():
+    async def scenario():
+        periodic.start(None, 0, logger, "disabled job")
+        return set(periodic.background_tasks)
+
+    assert asyncio.run(scenario()) == set()
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+from src.config import settings
+from src.exceptions import MaxTasksReachedError
+from src.repository import quotas
+from tests.conftest import FakeSession, compile_sql
+
+
+def test_reserve_is_one_conditional_upsert():
+    db = FakeSession([(3,)])
+    asyncio.run(quotas.reserve_tasks(7, 2, db))
+    (statement,) = db.statements
+    compiled = compile_sql(statement)
+    sql = str(compiled)
+    assert "ON CONFLICT (user_id) DO UPDATE SET task_count = " in sql
+    assert "WHERE task_quotas.task_count + " in sql
+    assert settings.max_tasks in compiled.params.values()
+    assert db.rollbacks == 0
+
+
+def test_reserve_rejected_when_upsert_updates_nothing():
+    db = FakeSession([])
+    with pytest.raises(MaxTasksReachedError):
+        asyncio.run(quotas.reserve_tasks(7, 1, db))
+    assert db.rollbacks == 1
+
+
+def test_reserve_over_limit_skips_database():
+    db = FakeSession()
+    with pytest.raises(MaxTasksReachedError):
+        asyncio.run(quotas.reserve_tasks(7, settings.max_tasks + 1, db))
+    assert db.statements == []
+
+
+def test_repair_counts_users_without_tasks_as_zero():
+    db = FakeSession([1], [(1, 4)], [1])
+    assert asyncio.run(quotas.repair_quotas([1, 2], db)) == [1]
+    lock, count, upsert = db.statements
+    assert str(compile_sql(lock)).endswith("FOR UPDATE")
+    compiled = compile_sql(upsert)
+    assert compiled.params["task_count_m0"] == 4
+    assert compiled.params["task_count_m1"] == 0
+    assert compiled.params["user_id_1"] == [1]
+    assert db.commits == 1
@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+from sqlalchemy.exc import SQLAlchemyError
+from src.exceptions import CreateError, DeleteError, GetError, UpdateError
+from src.models.tasks import Task
+from src.repository import tasks as repository
+from tests.conftest import FakeSession
+
+
+def test_create_task_commits_inserted_row():
+    db = FakeSession([(1,)], [("new task",)])
+    task = Task(title="new task", user_id=1)
+    row = asyncio.run(repository.create_task(1, task, db))
+    assert row == ("new task",)
+    assert len(db.statements) == 2
+    assert db.commits == 1
+    assert db.rollbacks == 0
+
+
+def test_create_task_rolls_back_on_error():
+    db = FakeSession([(1,)], SQLAlchemyError("boom"))
+    with pytest.raises(CreateError):
+        asyncio.run(repository.create_task(1, Task(title="t", user_id=1), db))
+    assert db.commits == 0
+    assert db.rollbacks == 1
+
+
+def test_get_task_missing(db):
+    with pytest.raises(GetError):
+        asyncio.run(repository.get_task(1, db, 1))
+
+
+def test_update_task_missing(db):
+    with pytest.raises(UpdateError):
+        asyncio.run(repository.update_task(1, Task(title="t"), db, 1))
+
+
+def test_delete_task_missing_keeps_quota(db):
+    with pytest.raises(DeleteError):
+        asyncio.run(repository.delete_task(1, db, 1))
+    assert len(db.statements) == 1
+    assert db.commits == 0
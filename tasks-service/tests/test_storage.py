@@ -0,0 +1,77 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+from src.storage import BlobStore, LocalBlobStore, iterate_bytes
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LocalBlobStore(str(tmp_path))
+
+
+async def read_all(store, digest, **kwargs):
+    return b"".join([chunk async for chunk in store.iterate(digest, **kwargs)])
+
+
+def test_blob_store_is_abstract():
+    with pytest.raises(TypeError):
+        BlobStore()
+
+
+def test_stage_commit_read_delete(store):
+    data = os.urandom(5000)
+
+    async def scenario():
+        staged = await store.stage(iterate_bytes(data, 1000), "text/plain")
+        assert not os.path.exists(store.path(staged.digest))
+        await store.commit(staged)
+        assert not os.path.exists(staged.location)
+        whole = await read_all(store, staged.digest, chunk_size=512)
+        part = await read_all(store, staged.digest, start=100, end=300)
+        await store.delete(staged.digest)
+        return staged, whole, part
+
+    staged, whole, part = asyncio.run(scenario())
+    assert staged.digest == hashlib.sha256(data).hexdigest()
+    assert staged.size == staged.stored_size == len(data)
+    assert staged.encoding is None
+    assert whole == data
+    assert part == data[100:300]
+    assert not os.path.exists(store.path(staged.digest))
+
+
+def test_identical_content_shares_a_path(store):
+    async def stage_and_commit():
+        staged = await store.stage(iterate_bytes(b"same bytes"))
+        await store.commit(staged)
+        return staged
+
+    first = asyncio.run(stage_and_commit())
+    second = asyncio.run(stage_and_commit())
+    assert first.location != second.location
+    assert first.digest == second.digest
+    assert os.listdir(store.staging) == []
+
+
+def test_discard_removes_staged_file(store):
+    async def scenario():
+        staged = await store.stage(iterate_bytes(b"never committed"))
+        await store.discard(staged)
+        await store.discard(staged)
+        return staged
+
+    staged = asyncio.run(scenario())
+    assert not os.path.exists(staged.location)
+    assert not os.path.exists(store.path(staged.digest))
+
+
+def test_failed_stage_leaves_nothing_behind(store):
+    async def chunks():
+        yield b"partial"
+        raise ConnectionError
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(store.stage(chunks()))
+    assert os.listdir(store.staging) == []
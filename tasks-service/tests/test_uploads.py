@@ -0,0 +1,68 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from src.uploads import UploadLimitMiddleware
+
+MAX_SIZE = 1000
+
+
+def make_client():
+    app = FastAPI()
+    app.add_middleware(UploadLimitMiddleware, max_size=MAX_SIZE)
+    app.state.reached = False
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        app.state.reached = True
+        form = await request.form()
+        data = await form["file"].read()
+        return {"size": len(data)}
+
+    return app, TestClient(app)
+
+
+def multipart(size):
+    return {"file": ("a.txt", b"x" * size, "text/plain")}
+
+
+def test_upload_under_limit_reaches_route():
+    app, client = make_client()
+    response = client.post("/upload", files=multipart(100))
+    assert response.status_code == 200
+    assert response.json() == {"size": 100}
+
+
+def test_rejected_by_content_length_before_reading():
+    app, client = make_client()
+    response = client.post("/upload", files=multipart(MAX_SIZE + 1))
+    assert response.status_code == 413
+    assert response.headers["connection"] == "close"
+    assert not app.state.reached
+
+
+def test_rejected_while_streaming():
+    app, client = make_client()
+    body = b"--b\r\n" + b"x" * 400
+
+    def chunks():
+        for _ in range(5):
+            yield body
+
+    response = client.post(
+        "/upload",
+        content=chunks(),
+        headers={"Content-Type": "multipart/form-data; boundary=b"},
+    )
+    assert response.status_code == 413
+    assert app.state.reached
+
+
+def test_other_bodies_not_limited():
+    app = FastAPI()
+    app.add_middleware(UploadLimitMiddleware, max_size=MAX_SIZE)
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return {"size": len(await request.body())}
+
+    response = TestClient(app).post("/echo", content=b"x" * (MAX_SIZE * 2))
+    assert response.json() == {"size": MAX_SIZE * 2}
@@ -2,6 +2,7 @@ import os
 
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from src.controller import auth, users
 from src.logger import setup_logger
 
@@ -9,7 +10,7 @@ logger = setup_logger()
 
 os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,